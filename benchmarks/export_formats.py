@@ -0,0 +1,67 @@
+"""Compares the encode time and file size of the formats animations can be exported to.
+
+    python benchmarks/export_formats.py [--runs 5] [--format gif apng] [animation files...]
+
+Exports every animation of the animation files, the examples by default, in each format
+that the installed Pillow supports and prints the median time and the size per format.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import PIL.Image
+
+from mcanitexgen.animation import load_animations_from_file
+from mcanitexgen.gif import FORMATS, create_gif
+
+EXAMPLES = [Path("examples/dog/dog.animation.py"), Path("examples/steve/steve.animation.py")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exporting animated images")
+    parser.add_argument("files", nargs="*", type=Path, default=EXAMPLES)
+    parser.add_argument("--format", nargs="+", default=list(FORMATS))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    formats = [FORMATS[name] for name in args.format if FORMATS[name].is_available()]
+    for name in args.format:
+        if not FORMATS[name].is_available():
+            print(f"Skipping {name}, it isn't supported by the installed Pillow")
+
+    with tempfile.TemporaryDirectory() as out:
+        for file in args.files:
+            for name, animation in load_animations_from_file(file).items():
+                texture = PIL.Image.open(Path(file.parent, animation.texture))
+                texture.load()
+                print(
+                    f"{name} ({texture.width}x{texture.height}, {len(animation.frames)} frames)"
+                )
+
+                for export_format in formats:
+                    dest = Path(out, f"{name}{export_format.extension}")
+                    times = []
+                    for _ in range(args.runs):
+                        start = time.perf_counter()
+                        create_gif(
+                            animation.frames,
+                            texture,
+                            animation.frametime,
+                            dest,
+                            format=export_format.name,
+                        )
+                        times.append(time.perf_counter() - start)
+
+                    print(
+                        f"  {export_format.name:5} {statistics.median(times) * 1000:8.1f}ms "
+                        f"{dest.stat().st_size / 1024:8.1f}KiB"
+                    )
+
+
+if __name__ == "__main__":
+    main()
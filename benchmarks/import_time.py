@@ -0,0 +1,67 @@
+"""Measures how long importing the CLI takes using `python -X importtime`.
+
+    python benchmarks/import_time.py [--runs 10] [--budget 150]
+
+Prints the median cumulative import time of a module and the modules that took longest
+to import themselves. Exits with 1 if the median exceeds the budget in milliseconds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """ Imports a module in a new interpreter and returns the self and cumulative µs per module """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_time), int(cumulative))
+
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of mcanitexgen")
+    parser.add_argument("--module", default="mcanitexgen.cli")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, help="Budget in milliseconds")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    cumulative = []
+    self_times = defaultdict(list)
+    for _ in range(args.runs):
+        times = import_times(args.module)
+        cumulative.append(times[args.module][1])
+        for name, (self_time, _) in times.items():
+            self_times[name].append(self_time)
+
+    median = statistics.median(cumulative) / 1000
+    print(f"import {args.module}: {median:.1f}ms (median of {args.runs} runs)")
+
+    slowest = sorted(self_times.items(), key=lambda i: statistics.median(i[1]), reverse=True)
+    for name, times in slowest[: args.top]:
+        print(f"  {statistics.median(times) / 1000:6.1f}ms  {name}")
+
+    if args.budget is not None and median > args.budget:
+        print(f"Exceeds budget of {args.budget}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
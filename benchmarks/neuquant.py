@@ -0,0 +1,71 @@
+"""Compares the batched NeuQuant training with the reference implementation.
+
+    python benchmarks/neuquant.py [--size 128] [--samplefac 1 10] [--runs 3] [texture.png]
+
+Prints the median training time and the mean distance of the pixels to their closest palette
+color for both. Without a texture, a noisy gradient of size x size pixels is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import PIL.Image
+
+from mcanitexgen.gif.images2gif import NeuQuant
+
+
+def gradient(size: int) -> PIL.Image.Image:
+    y, x = np.mgrid[0:size, 0:size] * 255 // max(size - 1, 1)
+    rgb = np.stack([x, y, (x * y) % 256], axis=2)
+    rgb = rgb + np.random.default_rng(0).normal(0, 8, rgb.shape)
+    alpha = np.full((size, size, 1), 255)
+    pixels = np.concatenate([np.clip(rgb, 0, 255), alpha], axis=2).astype(np.uint8)
+    return PIL.Image.fromarray(pixels, "RGBA")
+
+
+def mean_error(image: PIL.Image.Image, quantizer: NeuQuant) -> float:
+    pixels = np.asarray(image)[..., :3].reshape(-1, 3).astype(float)
+    palette = quantizer.colormap[:, :3].astype(float)
+    errors = [
+        np.sqrt(((chunk[:, None] - palette[None]) ** 2).sum(2).min(1))
+        for chunk in np.array_split(pixels, max(1, len(pixels) // 4096))
+    ]
+    return float(np.concatenate(errors).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NeuQuant palette training")
+    parser.add_argument("texture", nargs="?", help="Image to learn the palette from")
+    parser.add_argument("--size", type=int, default=128)
+    parser.add_argument("--samplefac", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--batchsize", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.texture:
+        image = PIL.Image.open(args.texture).convert("RGBA")
+    else:
+        image = gradient(args.size)
+    print(f"{image.width}x{image.height} pixels")
+
+    for samplefac in args.samplefac:
+        for name, batchsize in [("reference", 1), ("batched", args.batchsize)]:
+            times = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                quantizer = NeuQuant(image, samplefac, colors=255, batchsize=batchsize)
+                times.append(time.perf_counter() - start)
+
+            print(
+                f"  samplefac {samplefac:2} {name:9}  "
+                f"{statistics.median(times) * 1000:8.1f}ms  "
+                f"error {mean_error(image, quantizer):6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
 __version__ = "1.2.3"
-from . import animation, gif
+import importlib
+
+from . import animation
 
 __all__ = ["animation", "gif"]
+
+
+def __getattr__(name: str):
+    # The gif package imports Pillow and NumPy, which dominate startup time
+    if name == "gif":
+        return importlib.import_module(".gif", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,18 @@
-from .cli import app
+import sys
 
-app()
+from mcanitexgen import daemon
+
+
+def main():
+    # Forward to a running daemon before importing the CLI and its dependencies
+    exit_code = daemon.forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from mcanitexgen.cli import app
+
+    app()
+
+
+if __name__ == "__main__":
+    main()
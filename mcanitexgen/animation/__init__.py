@@ -1,3 +1,4 @@
+from .cache import AnimationCache
 from .generator import *
 from .parser import *
 
@@ -7,6 +8,7 @@ __all__ = [
     "TextureAnimation",
     "load_animations_from_file",
     "write_mcmeta_files",
+    "AnimationCache",
     "ParserError",
     "State",
     "Sequence",
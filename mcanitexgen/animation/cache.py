@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+__all__ = ["AnimationCache", "MemoryAnimationCache"]
+
+import hashlib
+import json
+from array import array
+from pathlib import Path
+from typing import Optional, Type
+
+import mcanitexgen
+
+from . import utils
+from .frames import FrameStore
+from .generator import Animation, Mark, TextureAnimation
+
+
+class AnimationCache:
+    """On-disk cache of the animations generated from animation files.
+
+    Entries are keyed by the version of mcanitexgen, the path of the animation file and the
+    hash of its content. Each entry records the hashes of the animation files that were
+    loaded while executing the file, and is only used while all of them are unchanged.
+
+    Cached animations only carry their generated output: texture, frametime, interpolate,
+    start, end, marks and frames. They have no states, sequences or root, so they are never
+    handed to animation files that load other files.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def load(
+        self, path: Path
+    ) -> Optional[tuple[dict[str, Type[TextureAnimation]], set[Path]]]:
+        """ Returns the cached animations of a file and its dependencies if they are up to date """
+
+        try:
+            entry = self._read_entry(path)
+            if entry is None:
+                return None
+
+            dependencies = {Path(p): h for p, h in entry["dependencies"].items()}
+            for dependency, expected_hash in dependencies.items():
+                if not dependency.is_file() or utils.file_hash(dependency) != expected_hash:
+                    return None
+
+            animations = {
+                name: deserialize_animation(name, data)
+                for name, data in entry["animations"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            # Unreadable entries are treated like missing ones and overwritten later
+            return None
+
+        return animations, set(dependencies)
+
+    def dependencies(self, path: Path) -> Optional[set[Path]]:
+        """ Returns the dependencies recorded the last time a file was cached """
+
+        try:
+            entry = self._read_entry(path)
+            return {Path(p) for p in entry["dependencies"]} if entry is not None else None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def store(
+        self,
+        path: Path,
+        animations: dict[str, Type[TextureAnimation]],
+        dependencies: set[Path],
+    ):
+        entry = {
+            "dependencies": {str(p): utils.file_hash(p) for p in sorted(dependencies)},
+            "animations": {
+                name: serialize_animation(animation) for name, animation in animations.items()
+            },
+        }
+        self._write_entry(path, entry)
+
+    def _read_entry(self, path: Path) -> Optional[dict]:
+        entry_path = self._entry_path(path)
+        if not entry_path.is_file():
+            return None
+
+        with open(entry_path, "r", encoding="utf8") as f:
+            return json.load(f)
+
+    def _write_entry(self, path: Path, entry: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._entry_path(path), "w", encoding="utf8") as f:
+            json.dump(entry, f)
+
+    def _entry_path(self, path: Path):
+        key = hashlib.sha256()
+        key.update(mcanitexgen.__version__.encode())
+        key.update(b"\0" + str(Path(path).resolve()).encode() + b"\0")
+        key.update(Path(path).read_bytes())
+        return Path(self.directory, f"{key.hexdigest()}.json")
+
+
+class MemoryAnimationCache(AnimationCache):
+    """AnimationCache that keeps its entries in memory, for long running processes.
+
+    Only the entry of the latest content of each animation file is kept.
+    """
+
+    def __init__(self):
+        super().__init__(Path())
+        self.entries: dict[Path, tuple[Path, dict]] = {}
+
+    def _read_entry(self, path: Path) -> Optional[dict]:
+        key, entry = self.entries.get(Path(path).resolve(), (None, None))
+        return entry if key == self._entry_path(path) else None
+
+    def _write_entry(self, path: Path, entry: dict):
+        self.entries[Path(path).resolve()] = (self._entry_path(path), entry)
+
+
+def serialize_animation(animation: Type[TextureAnimation]) -> dict:
+    """ Converts the generated animation of a TextureAnimation into JSON compatible data """
+
+    anim = animation.animation
+    return {
+        "texture": animation.texture.as_posix(),
+        "interpolate": animation.interpolate,
+        "frametime": animation.frametime,
+        "start": anim.start,
+        "end": anim.end,
+        "indices": anim.frames.indices.tolist(),
+        "times": anim.frames.times.tolist(),
+        "marks": {name: [mark.start, mark.end] for name, mark in anim.marks.items()},
+    }
+
+
+def deserialize_animation(name: str, data: dict) -> Type[TextureAnimation]:
+    """Creates an already generated TextureAnimation from serialized data.
+
+    The class has no states, sequences or root and can't be used to build other animations.
+    """
+
+    frames = FrameStore()
+    frames.indices = array("i", data["indices"])
+    frames.times = array("i", data["times"])
+    marks = {mark: Mark(start, end) for mark, (start, end) in data["marks"].items()}
+
+    cls: Type[TextureAnimation] = type(name, (TextureAnimation,), {})
+    cls.texture = Path(data["texture"])
+    cls.interpolate = data["interpolate"]
+    cls.frametime = data["frametime"]
+    cls.sequences = {}
+    cls.states = {}
+    cls.animation = Animation(data["start"], data["end"], frames, marks)
+    cls.timeline = cls.animation.to_timeline()
+    return cls
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+__all__ = ["DependencyGraph"]
+
+import ast
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from .cache import AnimationCache
+
+
+class DependencyGraph:
+    """Graph of the animation files that animation files load while they are executed.
+
+    Animations can reference the timelines of animations in other files (e.g. `Head.end`),
+    which makes the referencing file depend on the file defining them. Dependencies are
+    taken from the entries of an AnimationCache when available, otherwise they are
+    discovered by scanning the source of a file for paths to other animation files.
+    """
+
+    def __init__(self):
+        self.dependencies: dict[Path, set[Path]] = {}
+
+    @classmethod
+    def from_files(
+        cls, files: Iterable[Path], cache: Optional[AnimationCache] = None
+    ) -> DependencyGraph:
+        graph = cls()
+        for f in files:
+            recorded = cache.dependencies(f) if cache else None
+            graph.add(f, recorded if recorded is not None else find_dependencies(f))
+        return graph
+
+    def add(self, path: Path, dependencies: Iterable[Path]):
+        self.dependencies[Path(path).resolve()] = {Path(d).resolve() for d in dependencies}
+
+    def dependents(self, path: Path) -> set[Path]:
+        """ Files that directly depend on a file """
+
+        path = Path(path).resolve()
+        return {f for f, dependencies in self.dependencies.items() if path in dependencies}
+
+    def affected(self, changed: Iterable[Path]) -> set[Path]:
+        """ The changed files and all files that depend on them, directly or indirectly """
+
+        affected: set[Path] = set()
+        pending = [Path(f).resolve() for f in changed]
+        while pending:
+            path = pending.pop()
+            if path not in affected:
+                affected.add(path)
+                pending.extend(self.dependents(path))
+
+        return affected
+
+    def prerequisites(self, files: Iterable[Path]) -> dict[Path, set[Path]]:
+        """Maps each of the files to the files among them that have to be built before it.
+
+        Indirect dependencies are followed through other files of the graph.
+        """
+
+        files = [Path(f) for f in files]
+        resolved = {f.resolve(): f for f in files}
+
+        prerequisites = {}
+        for f in files:
+            prerequisites[f] = {
+                resolved[d] for d in self._transitive(f.resolve()) if d in resolved
+            }
+            prerequisites[f].discard(f)
+
+        self._check_cycles(prerequisites)
+        return prerequisites
+
+    def _transitive(self, path: Path) -> set[Path]:
+        dependencies: set[Path] = set()
+        pending = list(self.dependencies.get(path, ()))
+        while pending:
+            dependency = pending.pop()
+            if dependency not in dependencies:
+                dependencies.add(dependency)
+                pending.extend(self.dependencies.get(dependency, ()))
+
+        return dependencies
+
+    @staticmethod
+    def _check_cycles(prerequisites: dict[Path, set[Path]]):
+        from .generator import GeneratorError
+
+        for f, dependencies in prerequisites.items():
+            cycle = [d for d in dependencies if f in prerequisites[d]]
+            if cycle:
+                raise GeneratorError(f"Circular dependency between '{f}' and '{cycle[0]}'")
+
+
+def find_dependencies(path: Path) -> set[Path]:
+    """Finds the animation files an animation file loads by scanning its source for paths.
+
+    Paths are resolved relative to the directory of the file, which is how animation files
+    usually load their siblings: `Path(__file__).parent / "head.animation.py"`
+    """
+
+    path = Path(path)
+    try:
+        tree = ast.parse(path.read_text(encoding="utf8"), str(path))
+    except (OSError, SyntaxError, ValueError):
+        return set()
+
+    dependencies = set()
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Constant)
+            and isinstance(node.value, str)
+            and node.value.endswith(".animation.py")
+        ):
+            dependency = Path(path.parent, node.value)
+            if dependency.is_file() and dependency.resolve() != path.resolve():
+                dependencies.add(dependency.resolve())
+
+    return dependencies
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+__all__ = ["FrameStore", "RawFrameStore", "FrameCounter"]
+
+from array import array
+from itertools import islice
+from typing import Iterable, Iterator, Union
+
+
+class FrameStore:
+    """Compact storage for the frames of an animation.
+
+    Frames are stored in two parallel integer columns (state index and time) instead of one
+    dict per frame. Iterating or indexing a store still yields mcmeta-style
+    `{"index": ..., "time": ...}` dicts, which are created on demand.
+
+    Consecutive frames that show the same state are combined while the store is built, so
+    its size grows with the number of state changes rather than the number of actions.
+    Use a RawFrameStore to keep every frame.
+    """
+
+    __slots__ = ("indices", "times")
+
+    coalesce = True
+
+    def __init__(self, frames: Iterable[dict] = ()):
+        self.indices = array("i")
+        self.times = array("i")
+
+        for frame in frames:
+            self.append(frame["index"], frame["time"])
+
+    def append(self, index: int, time: int):
+        if self.coalesce and self.indices and self.indices[-1] == index:
+            self.times[-1] += time
+        else:
+            self.indices.append(index)
+            self.times.append(time)
+
+    def extend(self, other: FrameStore):
+        if not other:
+            return
+        elif self.coalesce and not other.coalesce:
+            for index, time in zip(other.indices, other.times):
+                self.append(index, time)
+        elif self.coalesce and self.indices and self.indices[-1] == other.indices[0]:
+            self.times[-1] += other.times[0]
+            self.indices.extend(islice(other.indices, 1, None))
+            self.times.extend(islice(other.times, 1, None))
+        else:
+            self.indices.extend(other.indices)
+            self.times.extend(other.times)
+
+    def extend_last(self, time: int):
+        """ Extends the time of the last frame """
+
+        self.times[-1] += time
+
+    def runs(self) -> Iterator[dict]:
+        """ Yields the frames with consecutive frames of the same index combined """
+
+        if not self.indices:
+            return
+
+        index, time = self.indices[0], self.times[0]
+        for next_index, next_time in zip(
+            islice(self.indices, 1, None), islice(self.times, 1, None)
+        ):
+            if next_index == index:
+                time += next_time
+            else:
+                yield {"index": index, "time": time}
+                index, time = next_index, next_time
+
+        yield {"index": index, "time": time}
+
+    def total_time(self):
+        return sum(self.times)
+
+    def __mul__(self, times: int):
+        store = type(self)()
+        if self.coalesce and self.indices and self.indices[0] == self.indices[-1]:
+            if len(self) == 1:
+                store.append(self.indices[0], self.times[0] * times)
+            else:
+                # The last frame of each repetition merges with the first one of the next
+                for _ in range(times):
+                    store.extend(self)
+        else:
+            store.indices = self.indices * times
+            store.times = self.times * times
+        return store
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[dict]:
+        for index, time in zip(self.indices, self.times):
+            yield {"index": index, "time": time}
+
+    def __getitem__(self, i: int) -> dict:
+        return {"index": self.indices[i], "time": self.times[i]}
+
+    def __eq__(self, other: object):
+        if isinstance(other, FrameStore):
+            return self.indices == other.indices and self.times == other.times
+        elif isinstance(other, (list, tuple)):
+            return self == type(self)(other)
+        else:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class RawFrameStore(FrameStore):
+    """ FrameStore that keeps consecutive frames of the same state apart """
+
+    __slots__ = ()
+
+    coalesce = False
+
+
+class FrameCounter:
+    """Stand-in for a FrameStore that only counts the frames added to it.
+
+    Used to compute the timing of animations without keeping their frames around.
+    """
+
+    __slots__ = ("count",)
+
+    def __init__(self, frames: Iterable[dict] = ()):
+        self.count = sum(1 for _ in frames)
+
+    def append(self, index: int, time: int):
+        self.count += 1
+
+    def extend(self, other: Union[FrameStore, FrameCounter]):
+        self.count += len(other)
+
+    def extend_last(self, time: int):
+        pass
+
+    def __mul__(self, times: int):
+        counter = FrameCounter()
+        counter.count = self.count * times
+        return counter
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other: object):
+        if isinstance(other, FrameCounter):
+            return self.count == other.count
+        else:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"FrameCounter({self.count})"
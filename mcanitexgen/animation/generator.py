@@ -7,20 +7,25 @@ __all__ = [
     "animation",
     "TextureAnimation",
     "load_animations",
+    "load_animation_files",
+    "find_animation_files",
     "load_animations_from_file",
     "write_mcmeta_files",
 ]
 
 import importlib
 import importlib.util
+import io
 import json
 from dataclasses import dataclass, field
 from pathlib import Path
 from types import ModuleType
-from typing import Iterator, Optional, Type, Union
+from typing import TYPE_CHECKING, ClassVar, Iterator, Optional, Type, Union
 
 from mcanitexgen.animation import utils
 
+from .dependencies import DependencyGraph
+from .frames import FrameCounter, FrameStore, RawFrameStore
 from .parser import (
     Action,
     Duration,
@@ -32,6 +37,9 @@ from .parser import (
     Weight,
 )
 
+if TYPE_CHECKING:
+    from .cache import AnimationCache
+
 
 class GeneratorError(Exception):
     pass
@@ -41,37 +49,164 @@ def write_mcmeta_files(
     texture_animations: dict[str, Type[TextureAnimation]],
     out: Path,
     indent: Optional[str] = None,
-):
+) -> tuple[int, int]:
+    """Writes the .mcmeta files of animations and returns how many were written and skipped.
+
+    Files whose content wouldn't change are left untouched, so their modification times
+    are preserved.
+    """
+
+    written = skipped = 0
     for animation in texture_animations.values():
-        with open(Path(out, f"{animation.texture}.mcmeta"), "w", encoding="utf8") as f:
-            json.dump(animation.to_mcmeta(), f, indent=indent)
+        buffer = io.StringIO()
+        json.dump(animation.to_mcmeta(), buffer, indent=indent)
+        content = buffer.getvalue().encode("utf8")
 
+        path = Path(out, f"{animation.texture}.mcmeta")
+        if utils.file_has_content(path, content):
+            skipped += 1
+        else:
+            with open(path, "wb") as f:
+                f.write(content)
+            written += 1
 
-def load_animations(src: Union[str, os.PathLike]):
-    src = Path(src)
+    return written, skipped
 
-    if src.is_dir():
-        files = list(utils.files_in_dir(src))
-    else:
-        files = [src]
-        src = src.parent
+
+def load_animations(
+    src: Union[str, os.PathLike], cache: Optional[AnimationCache] = None, jobs: int = 1
+):
+    """Loads the animations of an animation file or of all animation files in a directory.
+
+    With more than one job the files are executed and compiled in a pool of `jobs`
+    processes (0 uses one process per CPU). A file is only scheduled once the files it
+    depends on have been built. Results are merged in the same order as when loading
+    sequentially.
+
+    Animations built in the pool, like those from a cache, only carry their generated
+    output: texture, frametime, interpolate, start, end, marks and frames. They have no
+    states, sequences or root.
+    """
 
     animations: dict[str, Type[TextureAnimation]] = {}
-    for f in filter(lambda f: str(f).endswith(".animation.py"), files):
-        animations.update(load_animations_from_file(f))
+    for file_animations in load_animation_files(
+        find_animation_files(src), cache, jobs
+    ).values():
+        animations.update(file_animations)
 
     return animations
 
 
-def load_animations_from_file(path: Path):
-    spec = importlib.util.spec_from_file_location(path.name, path)
-    if spec is None or spec.loader is None:
-        raise GeneratorError(f"Couldn't load animations from '{path}'")
+def find_animation_files(src: Union[str, os.PathLike]) -> list[Path]:
+    """ The animation file itself or all animation files in a directory """
 
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)  # type: ignore
+    src = Path(src)
+    files = list(utils.files_in_dir(src)) if src.is_dir() else [src]
+    return [f for f in files if str(f).endswith(".animation.py")]
 
-    return get_texture_animations_from_module(module)
+
+def load_animation_files(
+    files: list[Path], cache: Optional[AnimationCache] = None, jobs: int = 1
+) -> dict[Path, dict[str, Type[TextureAnimation]]]:
+    """ Loads the animations of each of the files, see load_animations """
+
+    if jobs == 1 or len(files) <= 1:
+        return {f: load_animations_from_file(f, cache) for f in files}
+    else:
+        return dict(zip(files, _load_animations_in_pool(files, cache, jobs)))
+
+
+def _load_animations_in_pool(
+    files: list[Path], cache: Optional[AnimationCache], jobs: int
+) -> Iterator[dict[str, Type[TextureAnimation]]]:
+    # Importing the process pool is slow, and most builds don't use it
+    from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+    from .cache import deserialize_animation
+
+    prerequisites = DependencyGraph.from_files(files, cache).prerequisites(files)
+
+    futures: dict[Path, Future] = {}
+    with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+        while len(futures) < len(files):
+            done = {f for f, future in futures.items() if future.done()}
+            ready = [f for f in files if f not in futures and prerequisites[f] <= done]
+            for f in ready:
+                futures[f] = executor.submit(_load_compiled_animations, f, cache)
+
+            if len(futures) < len(files):
+                pending = [future for f, future in futures.items() if f not in done]
+                wait(pending, return_when=FIRST_COMPLETED)
+
+    results = []
+    errors = []
+    for f in files:
+        try:
+            results.append(futures[f].result())
+        except Exception as e:
+            errors.append(f"'{f}': {type(e).__name__}: {e}")
+
+    if errors:
+        raise GeneratorError(
+            f"Couldn't load animations from {len(errors)} file(s):\n" + "\n".join(errors)
+        )
+
+    for serialized in results:
+        yield {name: deserialize_animation(name, data) for name, data in serialized.items()}
+
+
+def _load_compiled_animations(path: Path, cache: Optional[AnimationCache]) -> dict[str, dict]:
+    """ Loads and compiles the animations of a file in a worker process """
+
+    from .cache import serialize_animation
+
+    animations = load_animations_from_file(path, cache)
+    return {name: serialize_animation(animation) for name, animation in animations.items()}
+
+
+# Animation files loaded while executing an animation file, one set per file being executed
+_dependency_stack: list[set[Path]] = []
+
+# Cache of the file being executed, animation files loaded by it are stored in it too
+_active_cache: Optional[AnimationCache] = None
+
+
+def load_animations_from_file(path: Path, cache: Optional[AnimationCache] = None):
+    global _active_cache
+
+    path = Path(path)
+    cache = cache or _active_cache
+
+    # Animation files loading other files use their states and sequences, which cached
+    # animations don't have. Nested loads execute the file and only update the cache.
+    nested = bool(_dependency_stack)
+    cached = cache.load(path) if cache and not nested else None
+    if cached:
+        animations, dependencies = cached
+    else:
+        spec = importlib.util.spec_from_file_location(path.name, path)
+        if spec is None or spec.loader is None:
+            raise GeneratorError(f"Couldn't load animations from '{path}'")
+
+        module = importlib.util.module_from_spec(spec)
+        previous_cache, _active_cache = _active_cache, cache
+        _dependency_stack.append(set())
+        try:
+            spec.loader.exec_module(module)  # type: ignore
+        finally:
+            dependencies = _dependency_stack.pop()
+            _active_cache = previous_cache
+
+        animations = get_texture_animations_from_module(module)
+        if cache:
+            cache.store(path, animations, dependencies)
+
+    # Files loading this file depend on it and everything it depends on
+    if _dependency_stack:
+        _dependency_stack[-1].add(path.resolve())
+        _dependency_stack[-1].update(dependencies)
+
+    return animations
 
 
 def get_texture_animations_from_module(module: ModuleType):
@@ -100,20 +235,44 @@ def animation(
         cls.interpolate = interpolate
         cls.frametime = frametime
 
-        cls.animation = unweighted_sequence_to_animation(cls.root, 0)
+        # Timeline and animation are generated the first time they are accessed
         return cls
 
     return wrapper
 
 
 class TextureAnimationMeta(type):
+    @property
+    def timeline(self) -> Timeline:
+        if "_timeline" not in self.__dict__:
+            if "_animation" in self.__dict__:
+                # The compiled animation already knows its timing, don't walk the tree again
+                self._timeline = self._animation.to_timeline()
+            else:
+                self._timeline = unweighted_sequence_to_animation(self.root, 0, Timeline)
+        return self.__dict__["_timeline"]
+
+    @timeline.setter
+    def timeline(self, timeline: Timeline):
+        self._timeline = timeline
+
+    @property
+    def animation(self) -> Animation:
+        if "_animation" not in self.__dict__:
+            self.compile()
+        return self.__dict__["_animation"]
+
+    @animation.setter
+    def animation(self, animation: Animation):
+        self._animation = animation
+
     @property
     def start(self):
-        return self.animation.start
+        return self.timeline.start
 
     @property
     def end(self):
-        return self.animation.end
+        return self.timeline.end
 
     @property
     def frames(self):
@@ -121,7 +280,7 @@ class TextureAnimationMeta(type):
 
     @property
     def marks(self):
-        return self.animation.marks
+        return self.timeline.marks
 
 
 class TextureAnimation(metaclass=TextureAnimationMeta):
@@ -133,7 +292,16 @@ class TextureAnimation(metaclass=TextureAnimationMeta):
     states: dict[int, State]
     root: Sequence
 
-    animation: Animation
+    _timeline: Timeline
+    _animation: Animation
+
+    @classmethod
+    def compile(cls):
+        """Generates the animation of the class unless it already was"""
+
+        if "_animation" not in cls.__dict__:
+            cls._animation = unweighted_sequence_to_animation(cls.root, 0)
+        return cls
 
     @classmethod
     def combine_consecutive_frames(cls, frames: Iterator[dict]):
@@ -157,7 +325,7 @@ class TextureAnimation(metaclass=TextureAnimationMeta):
             "animation": {
                 "interpolate": cls.interpolate,
                 "frametime": cls.frametime,
-                "frames": list(cls.combine_consecutive_frames(cls.animation.frames)),
+                "frames": list(cls.animation.frames.runs()),
             }
         }
 
@@ -166,21 +334,38 @@ class TextureAnimation(metaclass=TextureAnimationMeta):
 class Animation:
     start: int
     end: int
-    frames: list[dict] = field(default_factory=list)
+    frames: FrameStore = field(default_factory=FrameStore)
     marks: dict[str, Mark] = field(default_factory=dict)
 
+    frames_type: ClassVar[type] = FrameStore
+
+    def __post_init__(self):
+        if not isinstance(self.frames, self.frames_type):
+            self.frames = self.frames_type(self.frames)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def to_timeline(self) -> Timeline:
+        """ The timeline of the animation, without its frames """
+
+        counter = FrameCounter()
+        counter.count = len(self.frames)
+        return Timeline(self.start, self.end, counter, dict(self.marks))
+
     def append(self, other: Animation):
         # Fill time gap between animations
         time_gap = other.start - self.end
         if time_gap > 0 and self.frames:
-            self.frames[-1]["time"] += time_gap
+            self.frames.extend_last(time_gap)
         elif time_gap < 0:
             raise GeneratorError(
                 f"Can't append to animation that starts before the other ends"
             )
 
         self.end = other.end
-        self.frames += other.frames
+        self.frames.extend(other.frames)
         self.marks.update(other.marks)
 
     def add_frame(self, index: int, start: int, end: int):
@@ -192,10 +377,49 @@ class Animation:
             self.start = start
         elif start - self.end > 0:
             # Extend time of the last frame to fill the gap to the new frame
-            self.frames[-1]["time"] += start - self.end
+            self.frames.extend_last(start - self.end)
 
         self.end = end
-        self.frames.append({"index": index, "time": end - start})
+        self.frames.append(index, end - start)
+
+    def repeat(self, times: int, start: int):
+        """Creates an animation that plays this one 'times' times back to back from 'start'.
+
+        The frames of this animation must not depend on its start, i.e. it was generated from
+        a relative sequence. Like appending the repetitions one by one, only the marks of the
+        last repetition are kept.
+        """
+
+        last_offset = start - self.start + (times - 1) * self.duration
+        return type(self)(
+            start,
+            start + times * self.duration,
+            self.frames * times,
+            {name: mark.shifted(last_offset) for name, mark in self.marks.items()},
+        )
+
+
+@dataclass
+class RawAnimation(Animation):
+    """ An animation that keeps consecutive frames of the same state as separate frames """
+
+    frames: RawFrameStore = field(default_factory=RawFrameStore)
+
+    frames_type: ClassVar[type] = RawFrameStore
+
+
+@dataclass
+class Timeline(Animation):
+    """An animation that only keeps track of its start, end and marks.
+
+    Timelines are generated by the same functions as animations. Since they don't store any
+    frames, repeating one only shifts its marks, so the cost of generating a timeline grows
+    with the size of the sequence tree instead of the length of the animation.
+    """
+
+    frames: FrameCounter = field(default_factory=FrameCounter)  # type: ignore
+
+    frames_type: ClassVar[type] = FrameCounter
 
 
 @dataclass
@@ -203,10 +427,15 @@ class Mark:
     start: int
     end: int
 
+    def shifted(self, offset: int):
+        return Mark(self.start + offset, self.end + offset)
+
 
-def unweighted_sequence_to_animation(sequence: Sequence, start: int):
+def unweighted_sequence_to_animation(
+    sequence: Sequence, start: int, animation_type: Type[Animation] = Animation
+):
     assert not sequence.is_weighted
-    animation = Animation(start, start)
+    animation = animation_type(start, start)
 
     for action in sequence.actions:
         action_start, action_duration = get_unweighted_action_timeframe(action, animation.end)
@@ -215,9 +444,11 @@ def unweighted_sequence_to_animation(sequence: Sequence, start: int):
     return animation
 
 
-def weighted_sequence_to_animation(sequence: Sequence, start: int, duration: int):
+def weighted_sequence_to_animation(
+    sequence: Sequence, start: int, duration: int, animation_type: Type[Animation] = Animation
+):
     assert sequence.is_weighted
-    animation = Animation(start, start)
+    animation = animation_type(start, start)
 
     distributable_duration = duration - sequence.constant_duration
 
@@ -271,7 +502,7 @@ def append_action_to_animation(
     action: Action, start: int, duration: Optional[int], anim: Animation
 ):
     if isinstance(action, SequenceAction):
-        anim.append(sequence_action_to_animation(action, start, duration))
+        anim.append(sequence_action_to_animation(action, start, duration, type(anim)))
     elif isinstance(action, StateAction):
         assert duration is not None
         anim.add_frame(action.state.index, start, start + duration)
@@ -283,38 +514,97 @@ def append_action_to_animation(
         anim.marks[action.mark] = Mark(start, anim.end)
 
 
-def sequence_action_to_animation(action: SequenceAction, start: int, duration: Optional[int]):
-    anim = Animation(start, start)
+def sequence_action_to_animation(
+    action: SequenceAction,
+    start: int,
+    duration: Optional[int],
+    animation_type: Type[Animation] = Animation,
+):
+    anim = animation_type(start, start)
+    sequence = action.sequence
 
-    if action.sequence.is_weighted:
+    if sequence.is_weighted:
         if not duration:
             raise GeneratorError(
-                f"Didn't pass duration to weighted sequence '{action.sequence.name}'"
+                f"Didn't pass duration to weighted sequence '{sequence.name}'"
             )
 
         if action.is_weighted:
             duration_distributor = utils.DurationDistributor(duration, action.repeat)
+            templates: dict[int, Animation] = {}
             for _ in range(action.repeat):
                 anim.append(
-                    weighted_sequence_to_animation(
-                        action.sequence, anim.end, duration_distributor.take(1)
+                    repeated_sequence_to_animation(
+                        sequence,
+                        anim.end,
+                        duration_distributor.take(1),
+                        1,
+                        animation_type,
+                        templates,
                     )
                 )
 
             if not duration_distributor.is_empty():
                 raise GeneratorError(f"Couldn't distribute duration over weights")
         else:
-            for _ in range(action.repeat):
-                anim.append(
-                    weighted_sequence_to_animation(action.sequence, anim.end, duration)
+            anim.append(
+                repeated_sequence_to_animation(
+                    sequence, anim.end, duration, action.repeat, animation_type
                 )
+            )
     else:
         if duration:
-            raise GeneratorError(
-                f"Passing duration to unweighted sequence '{action.sequence.name}'"
-            )
+            raise GeneratorError(f"Passing duration to unweighted sequence '{sequence.name}'")
 
-        for _ in range(action.repeat):
-            anim.append(unweighted_sequence_to_animation(action.sequence, anim.end))
+        anim.append(
+            repeated_sequence_to_animation(
+                sequence, anim.end, None, action.repeat, animation_type
+            )
+        )
 
     return anim
+
+
+def repeated_sequence_to_animation(
+    sequence: Sequence,
+    start: int,
+    duration: Optional[int],
+    repeat: int,
+    animation_type: Type[Animation] = Animation,
+    templates: Optional[dict[int, Animation]] = None,
+):
+    """Plays a sequence 'repeat' times back to back.
+
+    Relative sequences are only generated once and the result is replicated, shifted to the
+    requested start. Templates can be shared between calls by passing a dict, in which they
+    are stored by duration.
+    """
+
+    if not sequence.is_relative:
+        anim = animation_type(start, start)
+        for _ in range(repeat):
+            anim.append(sequence_to_animation(sequence, anim.end, duration, animation_type))
+        return anim
+
+    key = duration or 0
+    if templates is None or key not in templates:
+        template = sequence_to_animation(sequence, start, duration, animation_type)
+        if templates is not None:
+            templates[key] = template
+    else:
+        template = templates[key]
+
+    return template.repeat(repeat, start)
+
+
+def sequence_to_animation(
+    sequence: Sequence,
+    start: int,
+    duration: Optional[int],
+    animation_type: Type[Animation] = Animation,
+):
+    if sequence.is_weighted:
+        assert duration is not None
+        return weighted_sequence_to_animation(sequence, start, duration, animation_type)
+    else:
+        return unweighted_sequence_to_animation(sequence, start, animation_type)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+__all__ = ["Manifest", "SourceEntry", "OutputEntry"]
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Type
+
+import mcanitexgen
+
+from . import utils
+from .dependencies import DependencyGraph
+from .generator import TextureAnimation
+
+
+@dataclass
+class OutputEntry:
+    path: Path
+    hash: str
+
+
+@dataclass
+class SourceEntry:
+    hash: str
+    animations: dict[str, OutputEntry] = field(default_factory=dict)
+
+
+class Manifest:
+    """Record of the .mcmeta files generated into an output directory.
+
+    For each animation file the manifest stores the hash of its content and, per
+    TextureAnimation class, the path and hash of the generated file. It's used to skip
+    animation files whose outputs are up to date and to delete outputs of animations that
+    no longer exist.
+    """
+
+    filename = ".mcanitexgen-manifest.json"
+
+    def __init__(self, directory: Path, settings: Optional[dict] = None):
+        self.directory = Path(directory)
+        self.settings = {"version": mcanitexgen.__version__, **(settings or {})}
+        self.sources: dict[Path, SourceEntry] = {}
+
+    @property
+    def path(self):
+        return Path(self.directory, self.filename)
+
+    @classmethod
+    def load(cls, directory: Path, settings: Optional[dict] = None) -> Manifest:
+        """Loads the manifest of an output directory.
+
+        Entries are discarded if they were generated by another version of mcanitexgen or
+        with different settings, since their outputs could differ.
+        """
+
+        manifest = cls(directory, settings)
+        try:
+            with open(manifest.path, "r", encoding="utf8") as f:
+                data = json.load(f)
+
+            if data["settings"] == manifest.settings:
+                for source, entry in data["sources"].items():
+                    manifest.sources[manifest._absolute(source)] = SourceEntry(
+                        entry["hash"],
+                        {
+                            name: OutputEntry(
+                                manifest._absolute(output["path"]), output["hash"]
+                            )
+                            for name, output in entry["animations"].items()
+                        },
+                    )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            manifest.sources.clear()
+
+        return manifest
+
+    def save(self):
+        data = {
+            "settings": self.settings,
+            "sources": {
+                self._relative(source): {
+                    "hash": entry.hash,
+                    "animations": {
+                        name: {"path": self._relative(output.path), "hash": output.hash}
+                        for name, output in entry.animations.items()
+                    },
+                }
+                for source, entry in self.sources.items()
+            },
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf8") as f:
+            json.dump(data, f, indent="\t")
+
+    def is_up_to_date(self, source: Path) -> bool:
+        """ Checks whether neither a file nor the outputs generated from it have changed """
+
+        entry = self.sources.get(Path(source).resolve())
+        if not entry or not Path(source).is_file() or utils.file_hash(source) != entry.hash:
+            return False
+
+        return all(
+            output.path.is_file() and utils.file_hash(output.path) == output.hash
+            for output in entry.animations.values()
+        )
+
+    def outdated(self, files: Iterable[Path], graph: DependencyGraph) -> list[Path]:
+        """ The files that aren't up to date or depend on files that aren't """
+
+        files = list(files)
+        affected = graph.affected(f for f in files if not self.is_up_to_date(f))
+        return [f for f in files if f.resolve() in affected]
+
+    def update(self, loaded: dict[Path, dict[str, Type[TextureAnimation]]]) -> list[Path]:
+        """Records the outputs generated from files and deletes their stale outputs.
+
+        The outputs must already have been written. All files are recorded before stale
+        outputs are deleted, so that an animation moved from one file to another keeps its
+        output. Returns the deleted outputs.
+        """
+
+        previous = []
+        for source, animations in loaded.items():
+            source = Path(source).resolve()
+            if source in self.sources:
+                previous.append(self.sources[source])
+
+            entry = SourceEntry(utils.file_hash(source))
+            for name, animation in animations.items():
+                path = Path(self.directory, f"{animation.texture}.mcmeta").resolve()
+                # Missing outputs get no hash, so the file is regenerated next time
+                output_hash = utils.file_hash(path) if path.is_file() else ""
+                entry.animations[name] = OutputEntry(path, output_hash)
+            self.sources[source] = entry
+
+        deleted = []
+        for entry in previous:
+            deleted.extend(self._delete_stale_outputs(entry))
+        return deleted
+
+    def remove_missing_sources(self) -> list[Path]:
+        """ Forgets deleted animation files and deletes their outputs """
+
+        deleted = []
+        for source in [s for s in self.sources if not s.is_file()]:
+            deleted.extend(self._delete_stale_outputs(self.sources.pop(source)))
+
+        return deleted
+
+    def _delete_stale_outputs(self, entry: SourceEntry) -> list[Path]:
+        current = {
+            output.path for e in self.sources.values() for output in e.animations.values()
+        }
+
+        deleted = []
+        for output in entry.animations.values():
+            # Outputs modified since they were generated are left alone
+            if (
+                output.path not in current
+                and output.path.is_file()
+                and utils.file_hash(output.path) == output.hash
+            ):
+                output.path.unlink()
+                deleted.append(output.path)
+
+        return deleted
+
+    def _relative(self, path: Path) -> str:
+        return Path(os.path.relpath(path, self.directory.resolve())).as_posix()
+
+    def _absolute(self, path: str) -> Path:
+        return Path(self.directory, path).resolve()
@@ -51,6 +51,9 @@ class Sequence:
 
         self.constant_duration = sum(map(lambda a: a.constant_duration(), self.actions))
 
+        # Sequences without timeframes produce the same frames wherever they start
+        self.is_relative = all(map(lambda a: a.is_relative, self.actions))
+
     def weighted_actions(self):
         return filter(lambda a: a.is_weighted, self.actions)
 
@@ -151,6 +154,15 @@ class Action(abc.ABC):
     def is_weighted(self):
         return isinstance(self.time, Weight)
 
+    @property
+    def is_relative(self):
+        if isinstance(self.time, Timeframe):
+            return False
+        elif isinstance(self, SequenceAction):
+            return self.sequence.is_relative
+        else:
+            return True
+
     def constant_duration(self):
         if isinstance(self.time, Duration):
             return self.time
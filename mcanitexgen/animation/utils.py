@@ -1,3 +1,4 @@
+import hashlib
 import math
 import os
 from pathlib import Path
@@ -61,3 +62,20 @@ def files_in_dir(dir: Path):
     for dirname, _, filenames in os.walk(dir):
         for filename in filenames:
             yield Path(dirname, filename)
+
+
+def file_hash(path: Path) -> str:
+    """ SHA-256 hex digest of the content of a file """
+
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def file_has_content(path: Path, content: bytes) -> bool:
+    """ Checks whether a file exists with exactly the given content """
+
+    try:
+        if os.path.getsize(path) != len(content):
+            return False
+        return file_hash(path) == hashlib.sha256(content).hexdigest()
+    except OSError:
+        return False
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+__all__ = ["FileWatcher"]
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from . import utils
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+class FileWatcher:
+    """Polls the animation files of a file or directory for changes.
+
+    Files are compared by modification time and size, so a poll only costs one stat call per
+    file. Added and deleted animation files count as changes as well.
+    """
+
+    def __init__(
+        self,
+        src: Union[str, os.PathLike],
+        interval: float = 0.1,
+        debounce: float = 0.05,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.src = Path(src)
+        self.interval = interval
+        self.debounce = debounce
+        self.sleep = sleep
+        self.snapshot = self._take_snapshot()
+
+    def poll(self) -> set[Path]:
+        """ Returns the files that changed since the last poll """
+
+        snapshot = self._take_snapshot()
+        changed = {
+            f
+            for f in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(f) != self.snapshot.get(f)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def wait_for_changes(self, timeout: Optional[float] = None) -> set[Path]:
+        """Blocks until files change and returns them.
+
+        Bursts of changes, like an editor saving several files, are batched: after the
+        first change the watcher keeps collecting changes until none happened for
+        `debounce` seconds. Returns an empty set if nothing changed within `timeout`.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        changed = self.poll()
+        while not changed:
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            self.sleep(self.interval)
+            changed = self.poll()
+
+        while True:
+            self.sleep(self.debounce)
+            burst = self.poll()
+            if not burst:
+                return changed
+            changed |= burst
+
+    def _take_snapshot(self) -> Snapshot:
+        if self.src.is_dir():
+            files = utils.files_in_dir(self.src)
+        else:
+            files = [self.src]
+
+        snapshot = {}
+        for f in filter(lambda f: str(f).endswith(".animation.py"), files):
+            try:
+                stat = f.stat()
+            except OSError:
+                continue
+            snapshot[f] = (stat.st_mtime_ns, stat.st_size)
+
+        return snapshot
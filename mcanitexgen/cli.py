@@ -4,15 +4,22 @@ import os
 from pathlib import Path
 from typing import Optional
 
-import PIL.Image
 import typer
 
 import mcanitexgen
 from mcanitexgen.animation import (
+    AnimationCache,
+    find_animation_files,
+    load_animation_files,
     load_animations,
-    load_animations_from_file,
     write_mcmeta_files,
 )
+from mcanitexgen.animation.dependencies import DependencyGraph
+from mcanitexgen.animation.manifest import Manifest
+from mcanitexgen.animation.watch import FileWatcher
+
+# Cache used when no cache directory is passed, set by long running processes like the daemon
+default_cache: Optional[AnimationCache] = None
 
 
 def version_callback(value: bool):
@@ -54,19 +61,105 @@ def generate(
     dry: bool = typer.Option(
         False, "--dry", help="Dry run. Don't generate any files", is_flag=True
     ),
+    cache: Optional[Path] = typer.Option(
+        None,
+        "--cache",
+        help="Directory used to cache generated animations between runs",
+        file_okay=False,
+    ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        min=0,
+        help="Number of processes used to load animation files. 0 uses one per CPU",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        "-w",
+        is_flag=True,
+        help="Keep running and regenerate files when animation files change",
+    ),
 ):
     if out is None:
         out = src if src.is_dir() else src.parent
 
-    texture_animations = load_animations(src)
-    if not dry:
-        out.mkdir(parents=True, exist_ok=True)
-        write_mcmeta_files(texture_animations, out, indent if not minify else None)
+    animation_cache = AnimationCache(cache) if cache else default_cache
+    indent = indent if not minify else None
+
+    def run():
+        if dry:
+            check_animations(src, animation_cache, jobs)
+        else:
+            build_animations(src, out, indent, animation_cache, jobs)  # type: ignore
 
+    if not watch:
+        run()
+        return
 
-@app.command(help="Create gifs for all animations in an animation file")
+    typer.echo(f"Watching '{src}' for changes. Press Ctrl+C to stop")
+    watcher = FileWatcher(src)
+    try:
+        while True:
+            try:
+                run()
+            except Exception as e:
+                # Keep watching, the error is probably fixed with the next change
+                typer.echo(f"{type(e).__name__}: {e}", err=True)
+
+            changed = watcher.wait_for_changes()
+            typer.echo(f"Changed: {', '.join(sorted(f.name for f in changed))}")
+    except KeyboardInterrupt:
+        pass
+
+
+def check_animations(src: Path, cache: Optional[AnimationCache], jobs: int):
+    # Animations are generated lazily, make sure they would generate without errors
+    animations = load_animations(src, cache, jobs)
+    for animation in animations.values():
+        animation.compile()
+
+    return animations
+
+
+def build_animations(
+    src: Path, out: Path, indent: Optional[str], cache: Optional[AnimationCache], jobs: int
+):
+    out.mkdir(parents=True, exist_ok=True)
+
+    # Only load files that changed since the last run, or depend on files that did
+    manifest = Manifest.load(out, {"indent": indent})
+    files = find_animation_files(src)
+    graph = DependencyGraph.from_files(files, cache)
+    loaded = load_animation_files(manifest.outdated(files, graph), cache, jobs)
+
+    # Generate every animation before writing, so that an error doesn't leave some files
+    # written and the manifest not updated
+    texture_animations = {}
+    for file_animations in loaded.values():
+        for name, animation in file_animations.items():
+            texture_animations[name] = animation.compile()
+    written, skipped = write_mcmeta_files(texture_animations, out, indent)
+
+    deleted = manifest.update(loaded)
+    deleted.extend(manifest.remove_missing_sources())
+    manifest.save()
+
+    typer.echo(
+        f"Wrote {written} .mcmeta file(s), {skipped} unchanged, "
+        f"{len(files) - len(loaded)} animation file(s) up to date, "
+        f"{len(deleted)} stale file(s) deleted"
+    )
+
+
+@app.command(
+    help="Create gifs, or other animated images, for all animations in an animation file"
+)
 def gif(
-    file: Path = typer.Argument(..., exists=True, dir_okay=False, readable=True),
+    src: Path = typer.Argument(
+        ..., exists=True, readable=True, help="File or directory containing animations"
+    ),
     out: Optional[Path] = typer.Option(
         None,
         "-o",
@@ -75,12 +168,120 @@ def gif(
         file_okay=False,
         writable=True,
     ),
+    format: str = typer.Option(
+        "gif", "--format", "-f", help="Format of the animated images: gif, webp or apng"
+    ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        min=0,
+        help="Number of processes used to load animation files and render gifs. "
+        "0 uses one per CPU",
+    ),
+    start: int = typer.Option(0, "--start", min=0, help="Tick the gifs start at"),
+    end: Optional[int] = typer.Option(
+        None, "--end", min=0, help="Tick the gifs end at. Defaults to the end of the animation"
+    ),
+    mark: Optional[str] = typer.Option(
+        None,
+        "--mark",
+        help="Only include the ticks of a mark. Animations without the mark are skipped",
+    ),
+    speed: float = typer.Option(
+        1.0, "--speed", help="Factor the animations are sped up by, e.g. 0.5 for half speed"
+    ),
 ):
-    out = out if out else file.parent
+    try:
+        export_format = mcanitexgen.gif.get_format(format)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="'--format'")
+
+    if speed <= 0:
+        raise typer.BadParameter(
+            f"Speed must be positive, got {speed}", param_hint="'--speed'"
+        )
+    if end is not None and end < start:
+        raise typer.BadParameter(
+            f"End '{end}' is before the start '{start}'", param_hint="'--end'"
+        )
+    if mark is not None and (start != 0 or end is not None):
+        raise typer.BadParameter(
+            "Can't be combined with --start or --end", param_hint="'--mark'"
+        )
+
+    if out is None:
+        out = src if src.is_dir() else src.parent
     out.mkdir(parents=True, exist_ok=True)
 
-    for animation in load_animations_from_file(file).values():
-        texture_path = Path(file.parent, animation.texture)
-        dest = Path(out, f"{os.path.splitext(animation.texture.name)[0]}.gif")
-        texture = PIL.Image.open(texture_path)
-        mcanitexgen.gif.create_gif(animation.frames, texture, animation.frametime, dest)
+    # Animations using the same texture are rendered together, so it's only decoded once
+    textures: dict[Path, list] = {}
+    loaded = load_animation_files(find_animation_files(src), default_cache, jobs)
+    for f, file_animations in loaded.items():
+        for animation in file_animations.values():
+            if mark is None:
+                first, last = start, end
+            elif mark in animation.marks:
+                first, last = animation.marks[mark].start, animation.marks[mark].end
+            else:
+                continue
+
+            # Ticks are counted from the start of the animation's timeline
+            frames = animation.frames
+            if mark is not None or start != 0 or end is not None:
+                frames = mcanitexgen.gif.slice_frames(
+                    frames,
+                    max(first - animation.start, 0),
+                    None if last is None else max(last - animation.start, 0),
+                )
+
+            name = os.path.splitext(animation.texture.name)[0]
+            dest = Path(out, f"{name}{export_format.extension}")
+            textures.setdefault(Path(f.parent, animation.texture), []).append(
+                (frames, animation.frametime, dest)
+            )
+
+    if mark is not None and not textures:
+        raise typer.BadParameter(f"No animation has a mark '{mark}'", param_hint="'--mark'")
+
+    mcanitexgen.gif.create_gifs(textures, jobs=jobs, format=format, speed=speed)
+
+
+@app.command(help="Check that all animations in an animation file generate without errors")
+def check(
+    src: Path = typer.Argument(
+        ..., exists=True, readable=True, help="File or directory containing animations"
+    ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        min=0,
+        help="Number of processes used to load animation files. 0 uses one per CPU",
+    ),
+):
+    animations = check_animations(src, default_cache, jobs)
+    typer.echo(f"{len(animations)} animation(s) generated without errors")
+
+
+@app.command(help="Run commands of clients in a warm process until interrupted")
+def serve(
+    socket: Optional[Path] = typer.Option(
+        None,
+        "--socket",
+        help="Unix domain socket to listen on. Defaults to MCANITEXGEN_SOCKET or a socket "
+        "in a directory only you can access",
+        dir_okay=False,
+    ),
+):
+    from mcanitexgen import daemon
+
+    # The default socket is passed on as None, the daemon creates its directory
+    typer.echo(
+        f"Listening on '{socket or daemon.default_socket_path()}'. Press Ctrl+C to stop"
+    )
+    try:
+        daemon.serve(socket)
+    except daemon.DaemonError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(1)
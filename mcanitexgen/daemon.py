@@ -0,0 +1,211 @@
+"""Daemon that runs CLI commands in a warm process, and the client forwarding to it.
+
+The client side only uses the standard library, so forwarding a command doesn't pay for
+importing typer, Pillow or NumPy. Requests and responses are single lines of JSON sent
+over a Unix domain socket:
+
+    {"args": ["generate", "src"], "cwd": "/path/to/pack"}
+    {"exit_code": 0, "output": "..."}
+"""
+
+from __future__ import annotations
+
+__all__ = ["DaemonError", "FORWARDED_COMMANDS", "default_socket_path", "forward", "serve"]
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Optional
+
+# Commands that can run in the daemon. Long running commands like `generate --watch` can't
+FORWARDED_COMMANDS = {"generate", "gif", "check"}
+BLOCKING_OPTIONS = {"--watch", "-w", "--help"}
+
+
+class DaemonError(Exception):
+    pass
+
+
+def default_socket_path() -> Path:
+    """MCANITEXGEN_SOCKET, or a socket in a directory only the user can access.
+
+    That's XDG_RUNTIME_DIR if set, otherwise a directory of the user in the temp directory,
+    which is created by the daemon.
+    """
+
+    if "MCANITEXGEN_SOCKET" in os.environ:
+        return Path(os.environ["MCANITEXGEN_SOCKET"])
+
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(os.environ["XDG_RUNTIME_DIR"], "mcanitexgen.sock")
+
+    user = os.getuid() if hasattr(os, "getuid") else "user"
+    return Path(tempfile.gettempdir(), f"mcanitexgen-{user}", "daemon.sock")
+
+
+def forward(args: list[str], socket_path: Optional[Path] = None) -> Optional[int]:
+    """Runs a command in the daemon if one is running and returns its exit code.
+
+    Returns None if the command can't be forwarded, in which case it has to run locally.
+    """
+
+    if not hasattr(socket, "AF_UNIX") or not args or args[0] not in FORWARDED_COMMANDS:
+        return None
+    if BLOCKING_OPTIONS.intersection(args):
+        return None
+
+    # Commands are only sent to a daemon of the same user, anyone else could read them and
+    # decide what the client outputs
+    socket_path = socket_path or default_socket_path()
+    if not _is_own_socket(socket_path):
+        return None
+
+    try:
+        response = _send(socket_path, {"args": args, "cwd": os.getcwd()})
+    except (OSError, ValueError):
+        return None
+
+    sys.stdout.write(response["output"])
+    sys.stdout.flush()
+    return response["exit_code"]
+
+
+def _is_own_socket(path: Path) -> bool:
+    try:
+        st = path.lstat()
+    except OSError:
+        return False
+
+    return stat.S_ISSOCK(st.st_mode) and _owned_by_user(st)
+
+
+def _owned_by_user(st: os.stat_result) -> bool:
+    return not hasattr(os, "getuid") or st.st_uid == os.getuid()
+
+
+def _create_private_directory(path: Path):
+    """ Creates a directory only the user can access, or checks that an existing one is """
+
+    path.mkdir(mode=0o700, exist_ok=True)
+    st = path.lstat()
+    if not stat.S_ISDIR(st.st_mode) or not _owned_by_user(st) or st.st_mode & 0o077:
+        raise DaemonError(f"'{path}' must be a directory only you can access")
+
+
+def _send(socket_path: Path, request: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(socket_path))
+        s.sendall(json.dumps(request).encode("utf8") + b"\n")
+        with s.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def run_command(args: list[str], cwd: str) -> dict:
+    """ Runs a CLI command in this process and captures its output """
+
+    import click
+    import typer.main
+
+    from mcanitexgen import cli
+
+    if not args or args[0] not in FORWARDED_COMMANDS:
+        return {"exit_code": 2, "output": f"Command can't run in the daemon: {args}\n"}
+
+    command: click.Command = typer.main.get_command(cli.app)
+    output = io.StringIO()
+    previous_cwd = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with redirect_stdout(output), redirect_stderr(output):
+            try:
+                result = command.main(args, prog_name="mcanitexgen", standalone_mode=False)
+                exit_code = result if isinstance(result, int) else 0
+            except click.ClickException as e:
+                e.show()
+                exit_code = e.exit_code
+            except click.Abort:
+                exit_code = 1
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        os.chdir(previous_cwd)
+
+    return {"exit_code": exit_code, "output": output.getvalue()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = run_command(list(request["args"]), str(request["cwd"]))
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"exit_code": 2, "output": f"Invalid request: {e}\n"}
+
+        self.wfile.write(json.dumps(response).encode("utf8") + b"\n")
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Handles one request at a time, since commands change the working directory"""
+
+    def __init__(self, socket_path: Path):
+        self.socket_path = Path(socket_path)
+        super().__init__(str(self.socket_path), _RequestHandler)
+
+    def server_bind(self):
+        super().server_bind()
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def serve(socket_path: Optional[Path] = None):
+    """Runs the daemon until interrupted.
+
+    Animations are cached in memory, so an animation file is only executed again
+    once it or a file it depends on changed. Files loaded by other animation files are
+    always executed for them, the cache only holds generated output.
+    """
+
+    from mcanitexgen import cli
+    from mcanitexgen.animation.cache import MemoryAnimationCache
+
+    if socket_path is None:
+        socket_path = default_socket_path()
+        if "MCANITEXGEN_SOCKET" not in os.environ:
+            _create_private_directory(socket_path.parent)
+
+    if socket_path.exists():
+        if not _owned_by_user(socket_path.lstat()):
+            raise DaemonError(f"'{socket_path}' belongs to another user")
+        try:
+            _send(socket_path, {"args": [], "cwd": os.getcwd()})
+        except (OSError, ValueError):
+            # Left behind by a daemon that didn't shut down cleanly
+            socket_path.unlink()
+        else:
+            raise DaemonError(f"A daemon is already listening on '{socket_path}'")
+
+    cli.default_cache = MemoryAnimationCache()
+    signal.signal(signal.SIGTERM, _interrupt)
+    with DaemonServer(socket_path) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def _interrupt(signum, frame):
+    # Shut down like on Ctrl+C, so the socket gets removed
+    raise KeyboardInterrupt()
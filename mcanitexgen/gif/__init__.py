@@ -1,3 +1,18 @@
+from .formats import *
 from .generator import *
+from .texture import *
+from .writer import *
 
-__all__ = ["create_gif"]
+__all__ = [
+    "create_gif",
+    "create_gifs",
+    "slice_frames",
+    "AnimationFormat",
+    "FORMATS",
+    "get_format",
+    "register_format",
+    "StateGifWriter",
+    "TextureSheet",
+    "load_texture_sheet",
+    "write_gif",
+]
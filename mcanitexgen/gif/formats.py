@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+__all__ = ["AnimationFormat", "FORMATS", "get_format", "register_format"]
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+import PIL.features
+from PIL.Image import Image
+from PIL.PngImagePlugin import APNG_DISPOSE_OP_NONE, APNG_DISPOSE_OP_PREVIOUS
+
+from .writer import fits_one_palette, write_gif
+
+Frames = Iterable[Tuple[int, float]]
+
+APNG_MAX_DELAY = 0xFFFF  # Milliseconds
+
+
+@dataclass(frozen=True)
+class AnimationFormat:
+    """A file format animations can be exported to.
+
+    `write` writes (state index, duration in seconds) frames of the states of a texture to
+    a file. Durations are multiples of 1 / `units_per_second`, the precision of the format.
+    """
+
+    name: str
+    extension: str
+    write: Callable[[Path, Sequence[Image], Frames], None]
+    units_per_second: int = 1000
+    feature: Optional[str] = None  # Pillow feature the format needs
+
+    def is_available(self) -> bool:
+        return self.feature is None or bool(PIL.features.check(self.feature))
+
+
+FORMATS: dict[str, AnimationFormat] = {}
+
+
+def register_format(format: AnimationFormat):
+    FORMATS[format.name] = format
+
+
+def get_format(name: str) -> AnimationFormat:
+    if name not in FORMATS:
+        raise ValueError(f"Unknown format '{name}', must be one of {', '.join(FORMATS)}")
+
+    format = FORMATS[name]
+    if not format.is_available():
+        raise ValueError(f"Format '{name}' isn't supported by the installed Pillow")
+
+    return format
+
+
+def write_preview_gif(dest: Path, states: Sequence[Image], frames: Frames):
+    # States with more colors than fit into one palette are quantised on their own. Some
+    # decoders (Pillow < 9) apply the local palette of a sub rectangle to the whole frame,
+    # so sub rectangles are only used with a shared palette.
+    shared = fits_one_palette(states)
+    write_gif(dest, states, frames, global_palette=shared, sub_rectangles=shared)
+
+
+def write_with_pillow(
+    dest: Path, images: list[Image], durations: list[int], format: str, **params
+):
+    """Writes an animation with one of Pillow's animated image plugins.
+
+    Pillow takes all frames at once. The images of the frames should be the state images
+    instead of copies, so that only a reference and a duration is held per frame.
+    """
+
+    images[0].save(
+        dest,
+        format,
+        save_all=True,
+        append_images=images[1:],
+        duration=durations,
+        loop=0,
+        **params,
+    )
+
+
+def write_webp(dest: Path, states: Sequence[Image], frames: Frames):
+    frames = list(frames)
+    images = [states[state] for state, _ in frames]
+    durations = [round(duration * 1000) for _, duration in frames]
+
+    write_with_pillow(dest, images, durations, "WEBP", lossless=True)
+
+
+def write_apng(dest: Path, states: Sequence[Image], frames: Frames):
+    # Delays are at most 65535 milliseconds, longer frames are split into parts. Pillow merges
+    # identical frames unless their disposal differs, so every other part is disposed to the
+    # part before it, which shows the same image.
+    images, durations, disposals = [], [], []
+    for state, duration in frames:
+        remaining = round(duration * 1000)
+        part = 0
+        while remaining > 0:
+            images.append(states[state])
+            durations.append(min(remaining, APNG_MAX_DELAY))
+            disposals.append(APNG_DISPOSE_OP_PREVIOUS if part % 2 else APNG_DISPOSE_OP_NONE)
+            remaining -= APNG_MAX_DELAY
+            part += 1
+
+    write_with_pillow(dest, images, durations, "PNG", disposal=disposals)
+
+
+register_format(AnimationFormat("gif", ".gif", write_preview_gif, units_per_second=100))
+register_format(AnimationFormat("webp", ".webp", write_webp, feature="webp_anim"))
+register_format(AnimationFormat("apng", ".apng", write_apng))
@@ -1,42 +1,201 @@
 from __future__ import annotations
 
-__all__ = ["create_gif"]
+__all__ = ["create_gif", "create_gifs", "slice_frames"]
 
 import math
 import warnings
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence as SequenceABC
+from itertools import accumulate, chain, groupby
 from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Sized, Tuple, Union
 
 from PIL.Image import Image
 
-from . import images2gif
+from mcanitexgen.animation.frames import FrameStore
+from mcanitexgen.animation.generator import GeneratorError
+from mcanitexgen.animation.utils import round_half_away_from_zero
 
+from .formats import get_format
+from .texture import TextureSheet, load_texture_sheet
 
-def get_animation_states_from_texture(texture: Image):
-    width, height = texture.size
 
-    if not math.log(width, 2).is_integer():
-        raise ValueError(f"Texture width '{width}' is not power of 2")
+def convert_to_gif_frames(
+    frames: Iterable[dict],
+    states: Sequence,
+    frametime: float,
+    units_per_second: int = 100,
+    speed: float = 1,
+):
+    """Yields (state, duration in seconds) for each GIF frame.
 
-    if not height % width == 0:
-        raise ValueError(f"Texture height '{height}' is not multiple of its width '{width}'")
+    Consecutive frames of the same state are merged into one GIF frame. Delays are whole
+    units, centiseconds for GIFs, so each frame ends at its rounded end time: rounding
+    errors are carried forward instead of adding up, and the total playback time stays exact.
+    Frames are played `speed` times faster than in game.
+    """
 
-    return [
-        texture.crop((0, i * width, width, (i + 1) * width))
-        for i in range(int(height / width))
-    ]
+    units_per_tick = units_per_second / 20 * frametime / speed
 
+    elapsed = 0  # In ticks
+    for index, run in groupby(frames, key=lambda frame: frame["index"]):
+        start = round_half_away_from_zero(elapsed * units_per_tick)
+        elapsed += sum(frame["time"] for frame in run)
+        end = round_half_away_from_zero(elapsed * units_per_tick)
 
-def convert_to_gif_frames(frames: list[dict], states: list[Image], frametime: float):
-    frametime = 1 / 20 * frametime
+        # Frames shorter than half a unit are skipped, the next frame makes up for it
+        if end > start:
+            yield (states[index], (end - start) / units_per_second)
+
+
+def slice_frames(
+    frames: Iterable[dict], start: int = 0, end: Optional[int] = None
+) -> Iterable[dict]:
+    """The frames between two ticks, counted from the start of the first frame.
+
+    Frames that overlap the start or end are cut to the part inside. The frames of a
+    FrameStore or other sequence are found by binary search over their cumulative times,
+    other iterables are consumed lazily up to the end.
+    """
+
+    if start < 0 or (end is not None and end < start):
+        raise ValueError(f"Invalid tick range from {start} to {end}")
+
+    if isinstance(frames, FrameStore):
+        indices, times = frames.indices, frames.times
+    elif isinstance(frames, SequenceABC):
+        indices = [frame["index"] for frame in frames]
+        times = [frame["time"] for frame in frames]
+    else:
+        return _slice_frame_iterator(frames, start, end)
+
+    # Frame i lasts from ends[i - 1] to ends[i]
+    ends = list(accumulate(times))
+    if end is None:
+        end = ends[-1] if ends else 0
+
+    sliced = []
+    for i in range(bisect_right(ends, start), min(bisect_left(ends, end) + 1, len(ends))):
+        time = min(ends[i], end) - max(ends[i] - times[i], start)
+        if time > 0:
+            sliced.append({"index": indices[i], "time": time})
+    return sliced
+
+
+def _slice_frame_iterator(
+    frames: Iterable[dict], start: int, end: Optional[int]
+) -> Iterator[dict]:
+    stop = math.inf if end is None else end
+
+    elapsed = 0
     for frame in frames:
-        yield (states[frame["index"]], frametime * frame["time"])
+        frame_start, elapsed = elapsed, elapsed + frame["time"]
+        if frame_start >= stop:
+            return
+
+        time = min(elapsed, stop) - max(frame_start, start)
+        if time > 0:
+            yield {"index": frame["index"], "time": time}
+
+
+def create_gif(
+    frames: Iterable[dict],
+    texture: Union[Image, TextureSheet],
+    frametime: int,
+    dest: Path,
+    format: str = "gif",
+    start: int = 0,
+    end: Optional[int] = None,
+    speed: float = 1,
+):
+    """Writes an animated GIF of the frames of an animation.
+
+    Frames can be any iterable, e.g. a generator over a long timeline. They are written
+    as they are consumed instead of being collected first. Other formats than GIF can be
+    written by passing the name of one of the registered formats (see FORMATS).
+
+    If frames is a collection, like the frames of an animation, only the states it shows
+    are taken from the texture. Otherwise all states are, as they could be shown.
+
+    Only the ticks from `start` to `end` are written (see slice_frames), played `speed` times
+    faster than in game.
+    """
 
+    export_format = get_format(format)
+    if speed <= 0:
+        raise ValueError(f"Speed must be positive, got {speed}")
+    if start != 0 or end is not None:
+        frames = slice_frames(frames, start, end)
 
-def create_gif(frames: list[dict], texture: Image, frametime: int, dest: Path):
-    states = get_animation_states_from_texture(texture)
+    sheet = texture if isinstance(texture, TextureSheet) else TextureSheet.from_image(texture)
 
-    if frames:
-        images, durations = zip(*convert_to_gif_frames(frames, states, frametime))
-        images2gif.writeGif(dest, images, durations, subRectangles=False, dispose=2)
+    # Frames refer to states by position, so that each state is only encoded once
+    if isinstance(frames, Sized):
+        shown = sorted({frame["index"] for frame in frames})
+        states: Sequence[Image] = [sheet[index] for index in shown]
+        positions = {index: position for position, index in enumerate(shown)}
     else:
+        states = sheet
+        positions = range(len(sheet))
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
         warnings.warn(f"No frames to create gif '{str(dest)}'")
+        return
+
+    gif_frames = convert_to_gif_frames(
+        chain([first], frames), positions, frametime, export_format.units_per_second, speed
+    )
+    export_format.write(dest, states, gif_frames)
+
+
+# (frames, frametime, destination) of an animation
+GifSpec = Tuple[Iterable[dict], int, Path]
+
+
+def create_gifs(textures: dict[Path, list[GifSpec]], jobs: int = 1, **options):
+    """Writes the animated GIFs of animations, grouped by the path of their texture.
+
+    Each texture is decoded once for all animations that use it. With more than
+    one job the textures are rendered in a pool of `jobs` processes (0 uses one process per
+    CPU), and all of them are attempted before errors are raised together.
+    Options, like the format, are passed to create_gif.
+    """
+
+    if jobs == 1 or len(textures) <= 1:
+        for path, gifs in textures.items():
+            _create_texture_gifs(path, gifs, options)
+    else:
+        _create_gifs_in_pool(textures, jobs, options)
+
+
+def _create_gifs_in_pool(textures: dict[Path, list[GifSpec]], jobs: int, options: dict):
+    # Importing the process pool is slow, and most runs don't use it
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+        futures = {
+            path: executor.submit(_create_texture_gifs, path, gifs, options)
+            for path, gifs in textures.items()
+        }
+
+    errors = []
+    for path, future in futures.items():
+        try:
+            future.result()
+        except Exception as e:
+            errors.append(f"'{path}': {type(e).__name__}: {e}")
+
+    if errors:
+        raise GeneratorError(
+            f"Couldn't create gifs of {len(errors)} texture(s):\n" + "\n".join(errors)
+        )
+
+
+def _create_texture_gifs(path: Path, gifs: list[GifSpec], options: dict):
+    """ Writes the gifs of all animations that use a texture """
+
+    sheet = load_texture_sheet(path)
+    for frames, frametime, dest in gifs:
+        create_gif(frames, sheet, frametime, dest, **options)
@@ -67,6 +67,7 @@ Useful links
 
 import os
 import time
+from collections import Counter
 
 try:
     import PIL
@@ -80,12 +81,10 @@ try:
 except ImportError:
     np = None
 
-def get_cKDTree():
-    try:
-        from scipy.spatial import cKDTree
-    except ImportError:
-        cKDTree = None
-    return cKDTree
+from .palette import map_to_palette
+
+# Alpha values of at most 128 are written as transparent
+TRANSPARENCY_LUT = [255 if a <= 128 else 0 for a in range(256)]
 
 
 # getheader gives a 87a header and a color palette (two elements in a list).
@@ -241,7 +240,7 @@ class GifWriter:
         bb += bytes([((dispose & 3) << 2)|(transparent_flag & 1)])  # low bit 1 == transparency,
         # 2nd bit 1 == user input , next 3 bits, the low two of which are used,
         # are dispose.
-        bb += intToBin( int(duration*100) ) # in 100th of seconds
+        bb += intToBin( int(round(duration*100)) ) # in 100th of seconds
         bb += bytes([transparency_index])
         bb += b'\x00'  # end
         return bb
@@ -359,12 +358,15 @@ class GifWriter:
         return ims2, xy
 
 
-    def convertImagesToPIL(self, images, dither, nq=0,images_info=None):
-        """ convertImagesToPIL(images, nq=0)
+    def convertImagesToPIL(self, images, dither, nq=0,images_info=None,palette=None):
+        """ convertImagesToPIL(images, nq=0, palette=None)
 
         Convert images to Paletted PIL images, which can then be
         written to a single animated GIF.
 
+        If palette is a paletted PIL image, all images are mapped onto
+        its palette instead of being quantized one by one.
+
         """
 
         # Convert to PIL images
@@ -387,21 +389,30 @@ class GifWriter:
 
         # Convert to paletted PIL images
         images, images2 = images2, []
-        if nq >= 1:
-            # NeuQuant algorithm
+        if palette is not None:
+            # Shared palette
             for im in images:
-                im = im.convert("RGBA") # NQ assumes RGBA
-                nqInstance = NeuQuant(im, int(nq)) # Learn colors from image
                 if dither:
-                    im = im.convert("RGB").quantize(palette=nqInstance.paletteImage(),colors=255)
+                    im2 = im.convert('RGB').quantize(palette=palette, dither=dither)
+                else:
+                    im2 = map_to_palette(im, palette)
+                if self.transparency:
+                    self.pasteTransparency(im2, im)
+                images2.append(im2)
+        elif nq >= 1:
+            # NeuQuant algorithm
+            for rgba in images:
+                rgba = rgba.convert("RGBA") # NQ assumes RGBA
+                # Learn colors from image, index 255 is left for transparency
+                nqInstance = NeuQuant(rgba, int(nq), colors=255)
+                if dither:
+                    im = rgba.convert("RGB").quantize(palette=nqInstance.paletteImage(),colors=255)
                 else:
-                    im = nqInstance.quantize(im,colors=255)  # Use to quantize the image itself
+                    im = nqInstance.quantize(rgba)  # Use to quantize the image itself
 
                 self.transparency = True # since NQ assumes transparency
                 if self.transparency:
-                    alpha = im.split()[3]
-                    mask = Image.eval(alpha, lambda a: 255 if a <=128 else 0)
-                    im.paste(255,mask=mask)
+                    self.pasteTransparency(im, rgba)
                 images2.append(im)
         else:
             # Adaptive PIL algorithm
@@ -410,15 +421,26 @@ class GifWriter:
             for i in range(len(images)):
                 im = images[i].convert('RGB').convert('P', palette=AD, dither=dither,colors=255)
                 if self.transparency:
-                    alpha = images[i].split()[3]
-                    mask = Image.eval(alpha, lambda a: 255 if a <=128 else 0)
-                    im.paste(255,mask=mask)
+                    self.pasteTransparency(im, images[i])
                 images2.append(im)
 
         # Done
         return images2
 
 
+    def pasteTransparency(self, im, source):
+        """ pasteTransparency(im, source)
+
+        Set the pixels of the paletted image im that are mostly
+        transparent in source to the transparent index 255. The mask
+        is made with a lookup table, in a single pass over the alpha.
+
+        """
+        if 'A' in source.getbands():
+            mask = source.getchannel('A').point(TRANSPARENCY_LUT)
+            im.paste(255, mask=mask)
+
+
     def writeGifToFile(self, fp, images, durations, loops, xys, disposes):
         """ writeGifToFile(fp, images, durations, loops, xys, disposes)
 
@@ -427,14 +449,13 @@ class GifWriter:
         """
 
         # Obtain palette for all images and count each occurance
-        palettes, occur = [], []
+        palettes = []
         for im in images:
             palettes.append( getheader(im)[0][3] )
-        for palette in palettes:
-            occur.append( palettes.count( palette ) )
+        occur = Counter(palettes)
 
-        # Select most-used palette as the global one (or first in case no max)
-        globalPalette = palettes[ occur.index(max(occur)) ]
+        # Select most-used palette as the global one (first in case of a tie)
+        globalPalette = max(palettes, key=occur.__getitem__)
 
         # Init
         frames = 0
@@ -644,7 +665,7 @@ def readGif(filename, asNumpy=True):
 
 
 class NeuQuant:
-    """ NeuQuant(image, samplefac=10, colors=256)
+    """ NeuQuant(image, samplefac=10, colors=256, batchsize=64)
 
     samplefac should be an integer number of 1 or higher, 1
     being the highest quality, but the slowest performance.
@@ -655,6 +676,12 @@ class NeuQuant:
     colors is the amount of colors to reduce the image to. This
     should best be a power of two.
 
+    batchsize is the amount of sampled pixels the network learns
+    from at once. The updates of a batch are computed with numpy
+    and applied together, which is much faster than learning from
+    one pixel at a time. A batchsize of 1 runs the reference
+    implementation, which learns from each pixel in turn.
+
     See also:
     http://members.ozemail.com.au/~dekker/NEUQUANT.HTML
 
@@ -725,7 +752,7 @@ class NeuQuant:
     a_s = None
 
 
-    def setconstants(self, samplefac, colors):
+    def setconstants(self, samplefac, colors, batchsize=64):
         self.NCYCLES = 100 # Number of learning cycles
         self.NETSIZE = colors # Number of colours used
         self.SPECIALS = 3 # Number of reserved colours used
@@ -756,10 +783,11 @@ class NeuQuant:
 
         self.pixels = None
         self.samplefac = samplefac
+        self.batchsize = batchsize
 
         self.a_s = {}
 
-    def __init__(self, image, samplefac=10, colors=256):
+    def __init__(self, image, samplefac=10, colors=256, batchsize=64):
 
         # Check Numpy
         if np is None:
@@ -772,13 +800,18 @@ class NeuQuant:
             raise IOError("Image mode should be RGBA.")
 
         # Initialize
-        self.setconstants(samplefac, colors)
-        self.pixels = np.fromstring(image.tostring(), np.uint32)
+        self.setconstants(samplefac, colors, batchsize)
+        self.pixels = np.frombuffer(image.tobytes(), np.uint32)
         self.setUpArrays()
 
-        self.learn()
-        self.fix()
-        self.inxbuild()
+        if self.batchsize > 1:
+            self.learnBatched()
+            self.fixBatched()
+            self.inxbuildBatched()
+        else:
+            self.learn()
+            self.fix()
+            self.inxbuild()
 
     def writeColourMap(self, rgb, outstream):
         for i in range(self.NETSIZE):
@@ -826,7 +859,7 @@ class NeuQuant:
             return self.a_s[(alpha, rad)]
         except KeyError:
             length = rad*2-1
-            mid = length/2
+            mid = length//2
             q = np.array(list(range(mid-1,-1,-1))+list(range(-1,mid)))
             a = alpha*(rad*rad - q*q)/(rad*rad)
             a[mid] = 0
@@ -901,35 +934,20 @@ class NeuQuant:
         biasRadius = self.INITBIASRADIUS
         alphadec = 30 + ((self.samplefac-1)/3)
         lengthcount = self.pixels.size
-        samplepixels = lengthcount / self.samplefac
-        delta = samplepixels / self.NCYCLES
+        samplepixels = lengthcount // self.samplefac
+        delta = max(1, samplepixels // self.NCYCLES)
         alpha = self.INITALPHA
 
         i = 0;
-        rad = biasRadius >> self.RADIUSBIASSHIFT
+        rad = int(biasRadius) >> self.RADIUSBIASSHIFT
         if rad <= 1:
             rad = 0
 
-        print("Beginning 1D learning: samplepixels = %1.2f  rad = %i" %
-                                                    (samplepixels, rad) )
-        step = 0
+        step = self.samplestep()
         pos = 0
-        if lengthcount%NeuQuant.PRIME1 != 0:
-            step = NeuQuant.PRIME1
-        elif lengthcount%NeuQuant.PRIME2 != 0:
-            step = NeuQuant.PRIME2
-        elif lengthcount%NeuQuant.PRIME3 != 0:
-            step = NeuQuant.PRIME3
-        else:
-            step = NeuQuant.PRIME4
 
         i = 0
-        printed_string = ''
         while i < samplepixels:
-            if i%100 == 99:
-                tmp = '\b'*len(printed_string)
-                printed_string = str((i+1)*100/samplepixels)+"%\n"
-                print(tmp + printed_string)
             p = self.pixels[pos]
             r = (p >> 16) & 0xff
             g = (p >>  8) & 0xff
@@ -954,12 +972,91 @@ class NeuQuant:
             if i%delta == 0:
                 alpha -= alpha / alphadec
                 biasRadius -= biasRadius / self.RADIUSDEC
-                rad = biasRadius >> self.RADIUSBIASSHIFT
+                rad = int(biasRadius) >> self.RADIUSBIASSHIFT
                 if rad <= 1:
                     rad = 0
 
-        finalAlpha = (1.0*alpha)/self.INITALPHA
-        print("Finished 1D learning: final alpha = %1.2f!" % finalAlpha)
+    def samplestep(self):
+        """ Step between sampled pixels, a prime that visits all of them """
+        lengthcount = self.pixels.size
+        if lengthcount%NeuQuant.PRIME1 != 0:
+            return NeuQuant.PRIME1
+        elif lengthcount%NeuQuant.PRIME2 != 0:
+            return NeuQuant.PRIME2
+        elif lengthcount%NeuQuant.PRIME3 != 0:
+            return NeuQuant.PRIME3
+        else:
+            return NeuQuant.PRIME4
+
+    def learnBatched(self):
+        """ Same as learn, but learns from batches of pixels at once
+
+        Within a batch, every pixel competes against the network as it
+        was at the start of the batch. The moves of all pixels towards
+        which a neuron is pulled are combined into one move towards
+        their weighted mean, as far as the pixels would have moved it
+        one after another.
+        """
+        biasRadius = self.INITBIASRADIUS
+        alphadec = 30 + ((self.samplefac-1)/3)
+        lengthcount = self.pixels.size
+        samplepixels = lengthcount // self.samplefac
+        delta = max(1, samplepixels // self.NCYCLES)
+        alpha = self.INITALPHA
+
+        # Sampled pixels in the order the reference visits them
+        positions = (np.arange(samplepixels, dtype=np.int64) * self.samplestep()) % lengthcount
+        p = self.pixels[positions]
+        samples = np.stack([p & 0xff, (p >> 8) & 0xff, (p >> 16) & 0xff], axis=1).astype('float64')
+
+        if samplepixels:
+            self.network[self.BGCOLOR] = samples[0] # Remember background colour
+
+        S, N = self.SPECIALS, self.NETSIZE
+        indices = np.arange(S, N)
+        for cycle in range(0, samplepixels, delta):
+            rad = int(biasRadius) >> self.RADIUSBIASSHIFT
+            if rad <= 1:
+                rad = 0
+            a = (1.0 * alpha) / self.INITALPHA
+
+            for start in range(cycle, min(cycle+delta, samplepixels), self.batchsize):
+                batch = samples[start:min(start+self.batchsize, cycle+delta, samplepixels)]
+
+                # Don't learn for specials
+                special = (batch[:,None,:] == self.network[None,:S]).all(2).any(1)
+                batch = batch[~special]
+                if not batch.size:
+                    continue
+
+                # contest() for all pixels of the batch
+                dists = np.abs(self.network[None,S:N] - batch[:,None,:]).sum(2)
+                bestpos = np.argmin(dists, 1)
+                bestbiaspos = np.argmin(dists - self.bias[None,S:N], 1)
+                hits = np.bincount(bestpos, minlength=N-S)
+                decay = (1-self.BETA) ** len(batch)
+                self.freq[S:N] *= decay
+                self.freq[S:N] += self.BETA * hits
+                self.bias[S:N] += self.BETAGAMMA * self.freq[S:N] * len(batch)
+                self.bias[S:N] -= self.BETAGAMMA * hits
+
+                # altersingle() and alterneigh() for all pixels of the batch
+                winners = S + bestbiaspos
+                distance = indices[None,:] - winners[:,None]
+                if rad > 0:
+                    weights = a * np.maximum(rad*rad - distance*distance, 0) / (rad*rad)
+                else:
+                    weights = np.zeros(distance.shape)
+                weights[distance == 0] = a
+
+                total = weights.sum(0)
+                moved = total > 0
+                target = weights[:,moved].T @ batch / total[moved,None]
+                amount = 1 - np.exp(np.log1p(-np.minimum(weights[:,moved], 1-1e-12)).sum(0))
+                self.network[S:N][moved] += amount[:,None] * (target - self.network[S:N][moved])
+
+            alpha -= alpha / alphadec
+            biasRadius -= biasRadius / self.RADIUSDEC
 
     def fix(self):
         for i in range(self.NETSIZE):
@@ -970,6 +1067,11 @@ class NeuQuant:
                 self.colormap[i,j] = x
             self.colormap[i,3] = i
 
+    def fixBatched(self):
+        """ Same as fix, with numpy """
+        self.colormap[:,:3] = np.clip(np.floor(0.5 + self.network), 0, 255)
+        self.colormap[:,3] = np.arange(self.NETSIZE)
+
     def inxbuild(self):
         previouscol = 0
         startpos = 0
@@ -1002,6 +1104,21 @@ class NeuQuant:
             self.netindex[j] = self.MAXNETPOS
 
 
+    def inxbuildBatched(self):
+        """ Same as inxbuild, with numpy """
+        order = np.argsort(self.colormap[:,1], kind='stable') # Index on g
+        self.colormap[:] = self.colormap[order]
+
+        g = self.colormap[:,1]
+        values = np.arange(256)
+        first = np.searchsorted(g, values, 'left')
+        after = np.searchsorted(g, values, 'right')
+        present = after > first
+
+        self.netindex[:] = np.where(first < self.NETSIZE, first, self.MAXNETPOS)
+        middle = (first + np.minimum(after, self.MAXNETPOS)) >> 1
+        self.netindex[present] = middle[present]
+
     def paletteImage(self):
         """ PIL weird interface for making a paletted image: create an image which
             already has the palette, and use that in Image.quantize. This function
@@ -1009,9 +1126,11 @@ class NeuQuant:
         if self.pimage is None:
             palette = []
             for i in range(self.NETSIZE):
-                palette.extend(self.colormap[i][:3])
+                palette.extend(int(c) for c in self.colormap[i][:3])
 
-            palette.extend([0]*(256-self.NETSIZE)*3)
+            # Unused entries repeat the first colour, so that no pixel
+            # is mapped onto them
+            palette.extend(palette[:3]*(256-self.NETSIZE))
 
             # a palette image to use for quant
             self.pimage = Image.new("P", (1, 1), 0)
@@ -1020,46 +1139,8 @@ class NeuQuant:
 
 
     def quantize(self, image):
-        """ Use a kdtree to quickly find the closest palette colors for the pixels """
-        if get_cKDTree():
-            return self.quantize_with_scipy(image)
-        else:
-            print('Scipy not available, falling back to slower version.')
-            return self.quantize_without_scipy(image)
-
-
-    def quantize_with_scipy(self, image):
-        w,h = image.size
-        px = np.asarray(image).copy()
-        px2 = px[:,:,:3].reshape((w*h,3))
-
-        cKDTree = get_cKDTree()
-        kdtree = cKDTree(self.colormap[:,:3],leafsize=10)
-        result = kdtree.query(px2)
-        colorindex = result[1]
-        print("Distance: %1.2f" % (result[0].sum()/(w*h)) )
-        px2[:] = self.colormap[colorindex,:3]
-
-        return Image.fromarray(px).convert("RGB").quantize(palette=self.paletteImage())
-
-
-    def quantize_without_scipy(self, image):
-        """" This function can be used if no scipy is availabe.
-        It's 7 times slower though.
-        """
-        w,h = image.size
-        px = np.asarray(image).copy()
-        memo = {}
-        for j in range(w):
-            for i in range(h):
-                key = (px[i,j,0],px[i,j,1],px[i,j,2])
-                try:
-                    val = memo[key]
-                except KeyError:
-                    val = self.convert(*key)
-                    memo[key] = val
-                px[i,j,0],px[i,j,1],px[i,j,2] = val
-        return Image.fromarray(px).convert("RGB").quantize(palette=self.paletteImage())
+        """ Map the pixels onto their closest palette colors """
+        return map_to_palette(image, self.paletteImage())
 
     def convert(self, *color):
         i = self.inxsearch(*color)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+__all__ = ["PaletteMapper", "palette_mapper", "map_to_palette"]
+
+from functools import lru_cache
+
+import numpy as np
+import PIL.Image
+from PIL.Image import Image
+
+
+class PaletteMapper:
+    """Maps RGB pixels onto the closest color of a palette.
+
+    Distances are computed once per distinct color and remembered, so mapping more images
+    onto the same palette only costs a lookup for the colors seen before. Of equally close
+    palette colors, the one with the lowest index is picked.
+    """
+
+    chunk_size = 4096
+
+    def __init__(self, colors):
+        self.colors = np.asarray(colors, dtype=np.int32).reshape(-1, 3)
+        self._keys = np.empty(0, dtype=np.uint32)  # Sorted packed RGB colors
+        self._indices = np.empty(0, dtype=np.uint8)
+
+    def map(self, rgb: np.ndarray) -> np.ndarray:
+        """ Returns the palette indices of an array of RGB pixels, in the shape of the pixels """
+
+        rgb = np.asarray(rgb)
+        unique, inverse = np.unique(_pack(rgb).ravel(), return_inverse=True)
+
+        new = unique[~self._known(unique)]
+        if new.size:
+            keys = np.concatenate([self._keys, new])
+            indices = np.concatenate([self._indices, self._nearest(new)])
+            order = np.argsort(keys)
+            self._keys, self._indices = keys[order], indices[order]
+
+        indices = self._indices[np.searchsorted(self._keys, unique)]
+        return indices[inverse.ravel()].reshape(rgb.shape[:-1])
+
+    def _known(self, keys: np.ndarray) -> np.ndarray:
+        if not self._keys.size:
+            return np.zeros(keys.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return self._keys[positions] == keys
+
+    def _nearest(self, keys: np.ndarray) -> np.ndarray:
+        # |c - p|² = |c|² - 2c·p + |p|², where |c|² doesn't change which p is closest.
+        # The values are small integers, so the float products are exact.
+        rgb = _unpack(keys).astype(np.float64)
+        colors = self.colors.astype(np.float64)
+        norms = (colors ** 2).sum(1)
+
+        indices = np.empty(len(rgb), dtype=np.uint8)
+        for start in range(0, len(rgb), self.chunk_size):
+            chunk = rgb[start : start + self.chunk_size]
+            distances = norms[None, :] - 2 * chunk @ colors.T
+            indices[start : start + self.chunk_size] = distances.argmin(1)
+        return indices
+
+
+@lru_cache(maxsize=16)
+def palette_mapper(colors: tuple[int, ...]) -> PaletteMapper:
+    """ The shared mapper of a palette, given as flat RGB values """
+
+    return PaletteMapper(colors)
+
+
+def map_to_palette(image: Image, palette: Image) -> Image:
+    """Maps an image onto the palette of a paletted image without dithering.
+
+    Unlike Image.quantize, each pixel gets exactly the closest palette color.
+    """
+
+    colors = tuple(palette.getpalette()[: 256 * 3])
+    indices = palette_mapper(colors).map(np.asarray(image.convert("RGB")))
+
+    im = PIL.Image.fromarray(indices, "P")
+    im.putpalette(colors)
+    return im
+
+
+def _pack(rgb: np.ndarray) -> np.ndarray:
+    rgb = rgb.astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def _unpack(keys: np.ndarray) -> np.ndarray:
+    return np.stack([(keys >> 16) & 0xFF, (keys >> 8) & 0xFF, keys & 0xFF], axis=1).astype(
+        np.int32
+    )
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+__all__ = ["TextureSheet", "load_texture_sheet"]
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import PIL.Image
+from PIL.Image import Image
+
+
+class TextureSheet:
+    """The states of an animated texture, stacked from top to bottom as squares.
+
+    The texture is decoded once into a NumPy array and states are views into it. A state is
+    only turned into an image when it's first accessed, so that states an animation never
+    shows cost nothing. RGBA state images share the memory of the sheet.
+
+    Textures with an alpha band or transparency are decoded as RGBA, all others as RGB.
+    """
+
+    def __init__(self, pixels: np.ndarray, mode: str):
+        self.pixels = pixels
+        self.mode = mode
+        self._images: dict[int, Image] = {}
+
+    @classmethod
+    def from_image(cls, texture: Image) -> TextureSheet:
+        width, height = texture.size
+
+        # Powers of 2 have a single bit set
+        if width <= 0 or width & (width - 1):
+            raise ValueError(f"Texture width '{width}' is not power of 2")
+
+        if not height % width == 0:
+            raise ValueError(
+                f"Texture height '{height}' is not multiple of its width '{width}'"
+            )
+
+        if "A" in texture.getbands() or "transparency" in texture.info:
+            mode = "RGBA"
+        else:
+            mode = "RGB"
+
+        if texture.mode != mode:
+            texture = texture.convert(mode)
+        return cls(np.asarray(texture), mode)
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    def state_pixels(self, index: int) -> np.ndarray:
+        """ The pixels of a state, a view into the sheet """
+
+        if not 0 <= index < len(self):
+            raise IndexError(f"Texture has no state {index}, it has {len(self)} state(s)")
+
+        return self.pixels[index * self.width : (index + 1) * self.width]
+
+    def __getitem__(self, index: int) -> Image:
+        image = self._images.get(index)
+        if image is None:
+            image = self._images[index] = PIL.Image.fromarray(
+                self.state_pixels(index), self.mode
+            )
+        return image
+
+    def __len__(self) -> int:
+        return self.pixels.shape[0] // self.width
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def load_texture_sheet(path: Union[str, os.PathLike]) -> TextureSheet:
+    """Decodes the texture sheet of a PNG file.
+
+    Recently decoded sheets are kept, animations that use the same texture share its sheet
+    until the file changes.
+    """
+
+    path = Path(path).resolve()
+    return _load_texture_sheet(path, path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _load_texture_sheet(path: Path, mtime: int) -> TextureSheet:
+    with PIL.Image.open(path) as texture:
+        return TextureSheet.from_image(texture)
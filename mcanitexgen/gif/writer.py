@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+__all__ = ["StateGifWriter", "create_palette", "fits_one_palette", "write_gif"]
+
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import PIL.Image
+from PIL.GifImagePlugin import getdata, getheader
+from PIL.Image import Image
+
+from . import images2gif
+
+Box = Tuple[int, int, int, int]
+
+
+class StateGifWriter:
+    """Writes an animated GIF whose frames each show one of a few states.
+
+    Animations only show a handful of distinct states of their texture, repeated many times.
+    A state is quantised and LZW encoded the first time a frame shows it, frames showing it
+    again reuse the encoded image. Only the graphics control extension is written per frame.
+
+    Frames are written to the file as they arrive, so memory use is bounded by the number of
+    distinct states rather than the number of frames:
+
+        with StateGifWriter(f, states) as writer:
+            writer.write_frames((state, delay) for ...)
+
+    With `global_palette`, one palette is computed for all states and written as the global
+    color table, instead of quantising each state on its own and writing local color tables.
+    If the states together have more colors than fit into one palette, each state is still
+    quantised on its own, so that a shared palette never costs quality.
+
+    With `sub_rectangles`, frames only contain the rectangle that changed since the previous
+    frame and are left in place (disposal 1), `dispose` is ignored. Each distinct transition
+    between two states is diffed once. Pixels that become transparent can't be drawn over a
+    frame that is left in place, so around such transitions full frames are written and the
+    frame before the transition is cleared (disposal 2).
+    """
+
+    def __init__(
+        self,
+        fp: BinaryIO,
+        states: Sequence[Image],
+        loops: int = 0,
+        dither: bool = False,
+        nq: int = 0,
+        dispose: int = 2,
+        global_palette: bool = False,
+        sub_rectangles: bool = False,
+    ):
+        self.fp = fp
+        self.states = states
+        self.loops = loops
+        self.dither = dither
+        self.nq = nq
+        self.dispose = dispose
+        self.global_palette = global_palette
+        self.sub_rectangles = sub_rectangles
+        self.frames = 0
+
+        self._gif = images2gif.GifWriter()
+        self._gif.transparency = False
+        self._global_palette: Optional[bytes] = None
+        self._palette_image: Optional[Image] = None
+        self._palette_checked = False
+        self._quantised: dict[int, Image] = {}
+        self._blocks: dict[tuple[int, Optional[Box]], bytes] = {}
+
+        # Sub rectangles
+        self._pixels: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self._transitions: dict[tuple[int, int], Optional[Box]] = {}
+        self._first: Optional[int] = None
+        self._previous: Optional[int] = None
+        self._pending: Optional[tuple[int, float]] = None
+
+    def write_frame(self, state: int, duration: float):
+        """Writes a frame that shows a state for a duration in seconds.
+
+        With sub rectangles, how a frame is written depends on the transition to the next
+        frame, so it's only written once the next frame arrives or the writer is closed.
+        """
+
+        if not self.sub_rectangles:
+            self._write(state, None, duration, self.dispose)
+            return
+
+        if self._pending is None:
+            self._first = state
+        else:
+            self._write_pending(state)
+        self._pending = (state, duration)
+
+    def write_frames(self, frames: Iterable[tuple[int, float]]):
+        """ Writes (state index, duration in seconds) frames, one at a time """
+
+        for state, duration in frames:
+            self.write_frame(state, duration)
+
+    def close(self):
+        """ Writes the trailer that ends the GIF """
+
+        if self._pending is not None:
+            # Looping GIFs continue with the first frame after the last one
+            self._write_pending(self._first if self.loops != 1 else None)
+            self._pending = None
+
+        if not self.frames:
+            raise ValueError("A gif needs at least one frame")
+        self.fp.write(b";")
+
+    def __enter__(self) -> StateGifWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def _write_pending(self, next_state: Optional[int]):
+        state, duration = self._pending
+
+        # Full frames are written after and before transitions that aren't clean
+        box = None
+        if self._previous is not None:
+            box = self._transition(self._previous, state)
+
+        clean_end = next_state is None or self._transition(state, next_state) is not None
+        if not clean_end:
+            box = None
+
+        self._write(state, box, duration, 1 if clean_end else 2)
+        self._previous = state
+
+    def _write(self, state: int, box: Optional[Box], duration: float, dispose: int):
+        if box == (0, 0, *self.states[state].size):
+            box = None
+
+        block = self._blocks.get((state, box))
+        if block is None:
+            block = self._blocks[(state, box)] = self._encode(state, box)
+
+        transparent_flag = 1 if self._gif.transparency else 0
+        self.fp.write(
+            self._gif.getGraphicsControlExt(
+                duration,
+                dispose,
+                transparent_flag=transparent_flag,
+                transparency_index=255,
+            )
+        )
+        self.fp.write(block)
+        self.frames += 1
+
+    def _encode(self, state: int, box: Optional[Box] = None) -> bytes:
+        """ Encodes a state, or the box of it, into the image block written for its frames """
+
+        im = self._quantise(state)
+        if box is not None:
+            im = im.crop(box)
+        offset = (0, 0) if box is None else box[:2]
+
+        palette = getheader(im)[0][3]
+        descriptor, *data = getdata(im, offset)
+
+        if self._global_palette is None:
+            # The palette of the first frame becomes the global color table
+            self._global_palette = palette
+            self.fp.write(self._gif.getheaderAnim(self.states[state]))
+            self.fp.write(palette)
+            self.fp.write(self._gif.getAppExt(self.loops))
+
+        if palette == self._global_palette and (
+            self.global_palette or self.sub_rectangles or self.dispose == 2
+        ):
+            return descriptor + b"".join(data)
+        else:
+            return self._gif.getImageDescriptor(im, offset) + palette + b"".join(data)
+
+    def _quantise(self, state: int) -> Image:
+        """Quantises a state and marks its transparent pixels.
+
+        Done once per state, boxes of the state are cropped from the result.
+        """
+
+        im = self._quantised.get(state)
+        if im is None:
+            palette = self._shared_palette() if self.global_palette else None
+            im = self._quantised[state] = self._gif.convertImagesToPIL(
+                [self.states[state]], self.dither, self.nq, palette=palette
+            )[0]
+
+        return im
+
+    def _shared_palette(self) -> Optional[Image]:
+        """ The palette of all states, or None if their colors don't fit into one palette """
+
+        if not self._palette_checked:
+            self._palette_checked = True
+            if fits_one_palette(self.states):
+                self._palette_image = create_palette(self.states, self.nq)
+
+        return self._palette_image
+
+    def _transition(self, previous: int, state: int) -> Optional[Box]:
+        """The box that changes from one state to another, or None if pixels become
+        transparent
+        """
+
+        key = (previous, state)
+        if key not in self._transitions:
+            rgb_before, opaque_before = self._state_pixels(previous)
+            rgb, opaque = self._state_pixels(state)
+
+            if (opaque_before & ~opaque).any():
+                self._transitions[key] = None
+            else:
+                changed = opaque & (~opaque_before | (rgb_before != rgb).any(2))
+                self._transitions[key] = _bounding_box(changed)
+
+        return self._transitions[key]
+
+    def _state_pixels(self, state: int) -> tuple[np.ndarray, np.ndarray]:
+        """ The RGB values of a state and which of its pixels aren't written as transparent """
+
+        if state not in self._pixels:
+            image = self.states[state]
+            rgba = np.asarray(image.convert("RGBA"))
+            if image.mode == "RGBA":
+                opaque = rgba[..., 3] > 128
+            else:
+                opaque = np.ones(rgba.shape[:2], dtype=bool)
+            self._pixels[state] = (rgba[..., :3], opaque)
+
+        return self._pixels[state]
+
+
+def _bounding_box(mask: np.ndarray) -> Box:
+    columns = np.flatnonzero(mask.any(0))
+    rows = np.flatnonzero(mask.any(1))
+    if not columns.size:
+        # Nothing changed, but a frame needs at least one pixel
+        return (0, 0, 1, 1)
+
+    return (int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1)
+
+
+def fits_one_palette(images: Sequence[Image]) -> bool:
+    """ Whether images together have few enough colors to share a palette without losses """
+
+    return _stack(images).getcolors(255) is not None
+
+
+def create_palette(images: Sequence[Image], nq: int = 0) -> Image:
+    """Quantises images together into a paletted image whose palette fits all of them.
+
+    The palette has at most 255 colors, index 255 is left for transparency. Unused entries
+    repeat a used color, so that mapping an image onto the palette never picks index 255.
+    If `nq` is nonzero, the palette is learned with NeuQuant using it as sample factor.
+    """
+
+    sheet = _stack(images)
+
+    # NeuQuant can't learn from less pixels, such small sheets only have a few colors anyway
+    if nq >= 1 and sheet.width * sheet.height >= images2gif.NeuQuant.MAXPRIME:
+        return images2gif.NeuQuant(sheet.convert("RGBA"), int(nq), colors=255).paletteImage()
+
+    palette = sheet.convert("P", palette=PIL.Image.ADAPTIVE, colors=255)
+    rgb = palette.getpalette()
+    used = {index for _, index in palette.getcolors(256)}
+    fill = rgb[3 * min(used) : 3 * min(used) + 3]
+    for index in set(range(256)) - used:
+        rgb[3 * index : 3 * index + 3] = fill
+    palette.putpalette(rgb)
+
+    return palette
+
+
+def _stack(images: Sequence[Image]) -> Image:
+    """ Stacks the RGB values of images from top to bottom """
+
+    sheet = PIL.Image.new(
+        "RGB", (max(im.width for im in images), sum(im.height for im in images))
+    )
+    y = 0
+    for im in images:
+        sheet.paste(im.convert("RGB"), (0, y))
+        y += im.height
+
+    return sheet
+
+
+def write_gif(
+    dest: Path,
+    states: Sequence[Image],
+    frames: Iterable[tuple[int, float]],
+    **options,
+):
+    """Writes an animated GIF of (state index, duration in seconds) frames.
+
+    Frames can be any iterable and are consumed lazily. See StateGifWriter for the options.
+    """
+
+    with open(dest, "wb") as f, StateGifWriter(f, states, **options) as writer:
+        writer.write_frames(frames)
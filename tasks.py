@@ -30,3 +30,8 @@ def test(c, verbose=False, s=False):
     if os.system(f"poetry run pytest --cov={str(SRC_DIR)} --cov-report=xml {flags}") == 0:
         os.system("poetry run coverage report")
         os.system("poetry run coverage-badge -o coverage.svg -f")
+
+
+@task
+def benchmark(c, name="import_time"):
+    os.system(f"poetry run python benchmarks/{name}.py")
@@ -1,6 +1,6 @@
 import pytest
 
-from mcanitexgen.animation.generator import Animation, GeneratorError
+from mcanitexgen.animation.generator import Animation, GeneratorError, RawAnimation
 
 
 def frame(index: int, time: int):
@@ -9,24 +9,24 @@ def frame(index: int, time: int):
 
 class Test_append:
     def test(self):
-        anim1 = Animation(0, 10, [frame(0, 10)])
-        anim2 = Animation(10, 20, [frame(0, 10)])
+        anim1 = RawAnimation(0, 10, [frame(0, 10)])
+        anim2 = RawAnimation(10, 20, [frame(0, 10)])
 
         anim1.append(anim2)
-        assert anim1 == Animation(0, 20, [frame(0, 10), frame(0, 10)])
+        assert anim1 == RawAnimation(0, 20, [frame(0, 10), frame(0, 10)])
 
     @pytest.mark.parametrize(
         "anim1, anim2, result",
         [
             (
-                Animation(0, 10, [frame(0, 10)]),
-                Animation(11, 20, [frame(0, 9)]),
-                Animation(0, 20, [frame(0, 11), frame(0, 9)]),
+                RawAnimation(0, 10, [frame(0, 10)]),
+                RawAnimation(11, 20, [frame(0, 9)]),
+                RawAnimation(0, 20, [frame(0, 11), frame(0, 9)]),
             ),
             (
-                Animation(0, 10, [frame(0, 10)]),
-                Animation(30, 40, [frame(0, 10)]),
-                Animation(0, 40, [frame(0, 30), frame(0, 10)]),
+                RawAnimation(0, 10, [frame(0, 10)]),
+                RawAnimation(30, 40, [frame(0, 10)]),
+                RawAnimation(0, 40, [frame(0, 30), frame(0, 10)]),
             ),
         ],
     )
@@ -37,8 +37,8 @@ class Test_append:
         assert anim1 == result
 
     def test_time_ranges_overlap(self):
-        anim1 = Animation(0, 10, [frame(0, 10)])
-        anim2 = Animation(5, 15, [frame(0, 10)])
+        anim1 = RawAnimation(0, 10, [frame(0, 10)])
+        anim2 = RawAnimation(5, 15, [frame(0, 10)])
 
         with pytest.raises(GeneratorError, match=".*starts before the other.*"):
             anim1.append(anim2)
@@ -48,7 +48,7 @@ class Test_add_frame:
     @pytest.mark.parametrize(
         "anim, index, start, end, result",
         [
-            (Animation(0, 0), 0, 0, 10, Animation(0, 10, [frame(0, 10)])),
+            (RawAnimation(0, 0), 0, 0, 10, RawAnimation(0, 10, [frame(0, 10)])),
         ],
     )
     def test(self, anim: Animation, index, start, end, result):
@@ -58,8 +58,8 @@ class Test_add_frame:
     @pytest.mark.parametrize(
         "anim, index, start, end, result",
         [
-            (Animation(0, 0), 0, 10, 25, Animation(10, 25, [frame(0, 15)])),
-            (Animation(10, 10), 0, 20, 30, Animation(20, 30, [frame(0, 10)])),
+            (RawAnimation(0, 0), 0, 10, 25, RawAnimation(10, 25, [frame(0, 15)])),
+            (RawAnimation(10, 10), 0, 20, 30, RawAnimation(20, 30, [frame(0, 10)])),
         ],
     )
     def test_add_frame_with_start_to_empty_animation(
@@ -72,18 +72,18 @@ class Test_add_frame:
         "anim, index, start, end, result",
         [
             (
-                Animation(0, 10, [frame(0, 10)]),
+                RawAnimation(0, 10, [frame(0, 10)]),
                 0,
                 20,
                 30,
-                Animation(0, 30, [frame(0, 20), frame(0, 10)]),
+                RawAnimation(0, 30, [frame(0, 20), frame(0, 10)]),
             ),
             (
-                Animation(20, 40, [frame(0, 5), frame(0, 5)]),
+                RawAnimation(20, 40, [frame(0, 5), frame(0, 5)]),
                 0,
                 60,
                 70,
-                Animation(20, 70, [frame(0, 5), frame(0, 25), frame(0, 10)]),
+                RawAnimation(20, 70, [frame(0, 5), frame(0, 25), frame(0, 10)]),
             ),
         ],
     )
@@ -102,9 +102,53 @@ class Test_add_frame:
         ],
     )
     def test_invalid_start_and_end(self, start, end):
-        anim = Animation(0, 0)
+        anim = RawAnimation(0, 0)
 
         with pytest.raises(
             GeneratorError, match=f"Illegal start and end for frame: '{start}' '{end}'"
         ):
             anim.add_frame(0, start, end)
+
+
+class Test_coalesce:
+    def test_add_frame(self):
+        anim = Animation(0, 0)
+        anim.add_frame(0, 0, 10)
+        anim.add_frame(0, 10, 15)
+        anim.add_frame(1, 15, 20)
+
+        assert list(anim.frames) == [frame(0, 15), frame(1, 5)]
+
+    def test_add_frame_after_gap(self):
+        anim = Animation(0, 0)
+        anim.add_frame(0, 0, 10)
+        anim.add_frame(0, 20, 25)
+
+        assert list(anim.frames) == [frame(0, 25)]
+
+    def test_append(self):
+        anim1 = Animation(0, 10, [frame(1, 5), frame(0, 5)])
+        anim2 = Animation(12, 20, [frame(0, 3), frame(2, 5)])
+        anim1.append(anim2)
+
+        assert list(anim1.frames) == [frame(1, 5), frame(0, 10), frame(2, 5)]
+
+    def test_repeat(self):
+        anim = Animation(0, 10, [frame(0, 5), frame(1, 2), frame(0, 3)])
+
+        assert list(anim.repeat(3, 0).frames) == [
+            frame(0, 5),
+            frame(1, 2),
+            frame(0, 8),
+            frame(1, 2),
+            frame(0, 8),
+            frame(1, 2),
+            frame(0, 3),
+        ]
+
+    def test_raw_animation_keeps_frames_apart(self):
+        anim = RawAnimation(0, 0)
+        anim.add_frame(0, 0, 10)
+        anim.add_frame(0, 10, 15)
+
+        assert list(anim.frames) == [frame(0, 10), frame(0, 5)]
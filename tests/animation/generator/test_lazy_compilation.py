@@ -0,0 +1,104 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mcanitexgen.animation import generator
+from mcanitexgen.animation.generator import (
+    GeneratorError,
+    Sequence,
+    State,
+    TextureAnimation,
+    animation,
+)
+
+
+def create_texture_animation():
+    @animation("test.png")
+    class Anim(TextureAnimation):
+        A = State(0)
+        B = State(1)
+
+        main = Sequence(A(duration=10, mark="a"), B(duration=5))
+
+    return Anim
+
+
+def test_decorator_doesnt_generate_animation():
+    anim = create_texture_animation()
+
+    assert "_timeline" not in anim.__dict__
+    assert "_animation" not in anim.__dict__
+
+
+def test_timing_doesnt_generate_animation():
+    anim = create_texture_animation()
+
+    assert anim.end == 15
+    assert anim.marks["a"].end == 10
+    assert "_timeline" in anim.__dict__
+    assert "_animation" not in anim.__dict__
+
+
+def test_timing_after_compile_reuses_animation():
+    anim = create_texture_animation().compile()
+
+    with patch.object(
+        generator,
+        "unweighted_sequence_to_animation",
+        wraps=generator.unweighted_sequence_to_animation,
+    ) as mock_generate:
+        assert (anim.start, anim.end) == (0, 15)
+        assert anim.marks == {"a": generator.Mark(0, 10)}
+
+    mock_generate.assert_not_called()
+
+
+def test_timeline_of_animation_matches_generated_timeline():
+    path = Path("tests/animation/examples/dog.animation.py")
+    for name, anim in generator.load_animations_from_file(path).items():
+        compiled = generator.load_animations_from_file(path)[name].compile()
+
+        assert (compiled.start, compiled.end) == (anim.start, anim.end)
+        assert compiled.marks == anim.marks
+
+
+@pytest.mark.parametrize(
+    "access", [lambda a: a.frames, lambda a: a.to_mcmeta(), lambda a: a.animation]
+)
+def test_generate_on_access(access):
+    anim = create_texture_animation()
+    access(anim)
+
+    assert "_animation" in anim.__dict__
+
+
+def test_compile():
+    anim = create_texture_animation()
+
+    assert anim.compile() is anim
+    animation = anim.__dict__["_animation"]
+    assert anim.compile().animation is animation
+
+
+def test_errors_are_raised_on_compile():
+    @animation("test.png")
+    class Anim(TextureAnimation):
+        A = State(0)
+
+        main = Sequence(A(end=10), A(end=5))
+
+    with pytest.raises(GeneratorError):
+        Anim.compile()
+
+
+def test_subclasses_generate_their_own_animation():
+    anim = create_texture_animation().compile()
+
+    @animation("other.png")
+    class Other(anim):  # type: ignore
+        main = Sequence(anim.A(duration=3))
+
+    assert Other.end == 3
+    assert Other.frames == [{"index": 0, "time": 3}]
+    assert anim.end == 15
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+
+from mcanitexgen.animation import generator
+from mcanitexgen.animation.generator import GeneratorError
+
+EXAMPLES = Path("tests/animation/examples")
+
+
+class Test_jobs:
+    def test_matches_sequential(self):
+        sequential = generator.load_animations(EXAMPLES)
+        parallel = generator.load_animations(EXAMPLES, jobs=2)
+
+        assert list(parallel) == list(sequential)
+        for name, animation in sequential.items():
+            assert parallel[name].to_mcmeta() == animation.to_mcmeta()
+            assert parallel[name].marks == animation.marks
+            assert parallel[name].frametime == animation.frametime
+
+    def test_errors_per_file(self, tmp_path: Path):
+        (tmp_path / "a.animation.py").write_text("raise ValueError('broken a')")
+        (tmp_path / "b.animation.py").write_text("")
+        (tmp_path / "c.animation.py").write_text("import doesnt_exist")
+
+        with pytest.raises(GeneratorError) as e:
+            generator.load_animations(tmp_path, jobs=2)
+
+        message = str(e.value)
+        assert "from 2 file(s)" in message
+        assert "a.animation.py': ValueError: broken a" in message
+        assert "c.animation.py': ModuleNotFoundError" in message
+        assert "b.animation.py" not in message
@@ -1,17 +1,22 @@
 import pytest
 
 from mcanitexgen.animation import generator
-from mcanitexgen.animation.generator import GeneratorError
+from mcanitexgen.animation.generator import Animation, GeneratorError, Mark
 from mcanitexgen.animation.parser import (
     Duration,
     Sequence,
     SequenceAction,
     State,
     StateAction,
+    Timeframe,
     Weight,
 )
 
 
+def frame(index: int, time: int):
+    return {"index": index, "time": time}
+
+
 class Test_Unweighted:
     @classmethod
     def unweighted_sequence(cls):
@@ -27,6 +32,29 @@ class Test_Unweighted:
         ):
             generator.sequence_action_to_animation(action, 0, 100)
 
+    def test_repeat(self):
+        action = SequenceAction(Test_Unweighted.unweighted_sequence(), repeat=3)
+
+        anim = generator.sequence_action_to_animation(action, 5, None)
+        assert anim == Animation(5, 50, [frame(0, 10), frame(1, 5)] * 3)
+
+    def test_repeat_shifts_marks_of_last_repetition(self):
+        sequence = Sequence(
+            StateAction(State(0), Duration(10), mark="a"),
+            StateAction(State(1), Duration(5), mark="b"),
+        )
+        action = SequenceAction(sequence, repeat=4)
+
+        anim = generator.sequence_action_to_animation(action, 10, None)
+        assert anim.marks == {"a": Mark(55, 65), "b": Mark(65, 70)}
+
+    def test_repeat_sequence_with_timeframe(self):
+        sequence = Sequence(StateAction(State(0), Timeframe(end=10)))
+        action = SequenceAction(sequence, repeat=2)
+
+        with pytest.raises(GeneratorError, match="Illegal start and end for frame"):
+            generator.sequence_action_to_animation(action, 0, None)
+
 
 class Test_Weighted:
     @classmethod
@@ -42,3 +70,19 @@ class Test_Weighted:
             GeneratorError, match="Didn't pass duration to weighted sequence 'weighted'"
         ):
             generator.sequence_action_to_animation(action, 0, None)
+
+    def test_repeat_with_duration(self):
+        action = SequenceAction(Test_Weighted.weighted_sequence(), Duration(10), repeat=3)
+
+        anim = generator.sequence_action_to_animation(action, 0, 10)
+        assert anim == Animation(0, 30, [frame(0, 5), frame(1, 5)] * 3)
+
+    def test_repeat_with_weight(self):
+        action = SequenceAction(Test_Weighted.weighted_sequence(), Weight(1), repeat=3)
+
+        anim = generator.sequence_action_to_animation(action, 0, 20)
+        assert anim == Animation(
+            0,
+            20,
+            [frame(0, 4), frame(1, 3), frame(0, 4), frame(1, 3), frame(0, 3), frame(1, 3)],
+        )
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from mcanitexgen.animation import generator
+from mcanitexgen.animation.generator import Mark, RawAnimation, Timeline
+from mcanitexgen.animation.parser import (
+    Duration,
+    Sequence,
+    SequenceAction,
+    State,
+    StateAction,
+    Timeframe,
+    Weight,
+)
+
+
+class Test_unweighted_sequence_to_timeline:
+    def test(self):
+        sequence = Sequence(
+            StateAction(State(0), Duration(5), mark="a"),
+            StateAction(State(1), Timeframe(start=20, duration=10), mark="b"),
+        )
+
+        timeline = generator.unweighted_sequence_to_animation(sequence, 0, Timeline)
+        assert timeline.start == 0
+        assert timeline.end == 30
+        assert timeline.duration == 30
+        assert timeline.marks == {"a": Mark(0, 5), "b": Mark(20, 30)}
+        assert len(timeline.frames) == 2
+
+    def test_weighted(self):
+        sequence = Sequence(
+            StateAction(State(0), Weight(1), mark="a"),
+            StateAction(State(0), Duration(10), mark="b"),
+            StateAction(State(2), Weight(1), mark="c"),
+        )
+
+        timeline = generator.weighted_sequence_to_animation(sequence, 0, 100, Timeline)
+        assert timeline.end == 100
+        assert timeline.marks == {"a": Mark(0, 45), "b": Mark(45, 55), "c": Mark(55, 100)}
+
+    def test_deeply_nested_repeats(self):
+        sequence = Sequence(StateAction(State(0), Duration(3), mark="a"))
+        for _ in range(6):
+            sequence = Sequence(SequenceAction(sequence, repeat=100))
+
+        timeline = generator.unweighted_sequence_to_animation(sequence, 0, Timeline)
+        assert timeline.end == 3 * 100 ** 6
+        assert timeline.marks == {"a": Mark(3 * 100 ** 6 - 3, 3 * 100 ** 6)}
+        assert len(timeline.frames) == 100 ** 6
+
+
+@pytest.mark.parametrize(
+    "file",
+    [
+        "steve.animation.py",
+        "dog.animation.py",
+        "unweighted_seq_in_weighted.animation.py",
+        "weighted_blinking.animation.py",
+    ],
+)
+def test_matches_animation(file: str):
+    animations = generator.load_animations_from_file(Path("tests/animation/examples", file))
+
+    for anim in animations.values():
+        assert anim.start == anim.animation.start
+        assert anim.end == anim.animation.end
+        assert anim.marks == anim.animation.marks
+
+        raw_animation = generator.unweighted_sequence_to_animation(anim.root, 0, RawAnimation)
+        assert len(raw_animation.frames) == len(anim.timeline.frames)
@@ -1,3 +1,5 @@
+import json
+import os
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -36,3 +38,42 @@ def test(simple_texture_animation):
                     ],
                 }
             }
+
+
+class Test_skip_unchanged:
+    def test_write(self, simple_texture_animation, tmp_path: Path):
+        counts = generator.write_mcmeta_files({"test": simple_texture_animation}, tmp_path)
+
+        assert counts == (1, 0)
+        assert json.loads(Path(tmp_path, "test.png.mcmeta").read_text()) == (
+            simple_texture_animation.to_mcmeta()
+        )
+
+    def test_skip_unchanged(self, simple_texture_animation, tmp_path: Path):
+        generator.write_mcmeta_files({"test": simple_texture_animation}, tmp_path)
+        path = Path(tmp_path, "test.png.mcmeta")
+        os.utime(path, (0, 0))
+
+        counts = generator.write_mcmeta_files({"test": simple_texture_animation}, tmp_path)
+
+        assert counts == (0, 1)
+        assert path.stat().st_mtime == 0
+
+    @pytest.mark.parametrize("content", ["", "{}", " " * 200])
+    def test_overwrite_changed(self, content, simple_texture_animation, tmp_path: Path):
+        path = Path(tmp_path, "test.png.mcmeta")
+        path.write_text(content)
+
+        counts = generator.write_mcmeta_files({"test": simple_texture_animation}, tmp_path)
+
+        assert counts == (1, 0)
+        assert json.loads(path.read_text()) == simple_texture_animation.to_mcmeta()
+
+    def test_indent_change(self, simple_texture_animation, tmp_path: Path):
+        generator.write_mcmeta_files({"test": simple_texture_animation}, tmp_path)
+
+        counts = generator.write_mcmeta_files(
+            {"test": simple_texture_animation}, tmp_path, indent="\t"
+        )
+
+        assert counts == (1, 0)
@@ -152,3 +152,20 @@ class Test_mul_and_rmul:
 
         with pytest.raises(NotImplementedError):
             sequence * repeat
+
+
+class Test_is_relative:
+    @pytest.mark.parametrize(
+        "actions, expected",
+        [
+            ([], True),
+            ([StateAction(State(0), Duration(1)), StateAction(State(0), Weight(1))], True),
+            ([SequenceAction(Sequence(StateAction(State(0), Duration(1))), repeat=3)], True),
+            ([StateAction(State(0), Timeframe(end=10))], False),
+            ([StateAction(State(0), Timeframe(start=2))], False),
+            ([SequenceAction(Sequence(), Timeframe(start=2))], False),
+            ([SequenceAction(Sequence(StateAction(State(0), Timeframe(end=10))))], False),
+        ],
+    )
+    def test(self, actions, expected):
+        assert Sequence(*actions).is_relative == expected
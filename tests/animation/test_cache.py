@@ -0,0 +1,141 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from mcanitexgen.animation import generator
+from mcanitexgen.animation.cache import AnimationCache, MemoryAnimationCache
+
+HEAD = """
+from mcanitexgen.animation import Sequence, State, TextureAnimation, animation
+
+@animation("head.png")
+class Head(TextureAnimation):
+    A = State(0)
+    B = State(1)
+
+    main = Sequence(A(duration={duration}, mark="a"), B(duration=5))
+"""
+
+BODY = """
+from pathlib import Path
+
+from mcanitexgen.animation import Sequence, State, TextureAnimation, animation
+from mcanitexgen.animation.generator import load_animations_from_file
+
+Head = load_animations_from_file(Path(__file__).parent / "head.animation.py")["Head"]
+
+@animation("body.png")
+class Body(TextureAnimation):
+    A = State(0)
+
+    main = Sequence(A(duration=Head.end))
+"""
+
+
+def write(path: Path, source: str):
+    path.write_text(textwrap.dedent(source))
+    return path
+
+
+@pytest.fixture
+def files(tmp_path: Path):
+    head = write(tmp_path / "head.animation.py", HEAD.format(duration=10))
+    body = write(tmp_path / "body.animation.py", BODY)
+    return head, body
+
+
+@pytest.fixture
+def cache(tmp_path: Path):
+    return AnimationCache(tmp_path / "cache")
+
+
+def is_cached(animation):
+    # Cached animations are created without executing their animation file
+    return "root" not in animation.__dict__
+
+
+class Test_cache:
+    def test_load_from_cache(self, files, cache: AnimationCache):
+        head, _ = files
+
+        animations = generator.load_animations_from_file(head, cache)
+        cached = generator.load_animations_from_file(head, cache)
+
+        assert not is_cached(animations["Head"])
+        assert is_cached(cached["Head"])
+        assert cached["Head"].to_mcmeta() == animations["Head"].to_mcmeta()
+        assert cached["Head"].marks == animations["Head"].marks
+        assert cached["Head"].end == animations["Head"].end
+
+    def test_changed_source(self, files, cache: AnimationCache):
+        head, _ = files
+
+        generator.load_animations_from_file(head, cache)
+        write(head, HEAD.format(duration=20))
+        animations = generator.load_animations_from_file(head, cache)
+
+        assert not is_cached(animations["Head"])
+        assert animations["Head"].end == 25
+
+    def test_changed_dependency(self, files, cache: AnimationCache):
+        head, body = files
+
+        generator.load_animations_from_file(body, cache)
+        assert is_cached(generator.load_animations_from_file(body, cache)["Body"])
+
+        write(head, HEAD.format(duration=20))
+        animations = generator.load_animations_from_file(body, cache)
+
+        assert not is_cached(animations["Body"])
+        assert animations["Body"].end == 25
+
+    def test_dependencies(self, files, cache: AnimationCache):
+        head, body = files
+
+        generator.load_animations_from_file(body, cache)
+        _, dependencies = cache.load(body)
+
+        assert dependencies == {head.resolve()}
+
+    def test_corrupt_entry(self, files, cache: AnimationCache):
+        head, _ = files
+
+        generator.load_animations_from_file(head, cache)
+        cache._entry_path(head).write_text("{")
+
+        assert cache.load(head) is None
+        assert not is_cached(generator.load_animations_from_file(head, cache)["Head"])
+
+    def test_load_animations(self, files, cache: AnimationCache):
+        head, _ = files
+
+        animations = generator.load_animations(head.parent, cache)
+        cached = generator.load_animations(head.parent, cache)
+
+        assert animations.keys() == cached.keys() == {"Head", "Body"}
+        assert all(map(is_cached, cached.values()))
+
+
+class Test_MemoryAnimationCache:
+    def test_load_from_cache(self, files):
+        head, _ = files
+        cache = MemoryAnimationCache()
+
+        animations = generator.load_animations_from_file(head, cache)
+        cached = generator.load_animations_from_file(head, cache)
+
+        assert is_cached(cached["Head"])
+        assert cached["Head"].to_mcmeta() == animations["Head"].to_mcmeta()
+
+    def test_keeps_latest_entry(self, files):
+        head, body = files
+        cache = MemoryAnimationCache()
+
+        generator.load_animations_from_file(body, cache)
+        write(head, HEAD.format(duration=20))
+        generator.load_animations_from_file(head, cache)
+
+        assert len(cache.entries) == 2
+        assert generator.load_animations_from_file(head, cache)["Head"].end == 25
+        assert not is_cached(generator.load_animations_from_file(body, cache)["Body"])
@@ -0,0 +1,162 @@
+from pathlib import Path
+
+import pytest
+
+from mcanitexgen.animation import generator
+from mcanitexgen.animation.cache import AnimationCache
+from mcanitexgen.animation.dependencies import DependencyGraph, find_dependencies
+from mcanitexgen.animation.generator import GeneratorError
+
+ANIMATION = """
+from mcanitexgen.animation import Sequence, State, TextureAnimation, animation
+
+@animation("{name}.png")
+class {cls}(TextureAnimation):
+    A = State(0)
+
+    main = Sequence(A(duration=10))
+"""
+
+DEPENDENT = """
+from pathlib import Path
+
+from mcanitexgen.animation import Sequence, State, TextureAnimation, animation
+from mcanitexgen.animation.generator import load_animations_from_file
+
+{dependency} = load_animations_from_file(Path(__file__).parent / "{file}")["{dependency}"]
+
+@animation("{name}.png")
+class {cls}(TextureAnimation):
+    A = State(0)
+
+    main = Sequence(A(duration={dependency}.end + 1))
+"""
+
+USES_STATES = """
+from pathlib import Path
+
+from mcanitexgen.animation import Sequence, TextureAnimation, animation
+from mcanitexgen.animation.generator import load_animations_from_file
+
+Head = load_animations_from_file(Path(__file__).parent / "head.animation.py")["Head"]
+
+@animation("body.png")
+class Body(TextureAnimation):
+    main = Sequence(Head.A(duration=Head.end))
+"""
+
+
+@pytest.fixture
+def files(tmp_path: Path):
+    """ body depends on head, tail depends on body, eye is independent """
+
+    head = tmp_path / "head.animation.py"
+    head.write_text(ANIMATION.format(name="head", cls="Head"))
+    body = tmp_path / "body.animation.py"
+    body.write_text(
+        DEPENDENT.format(name="body", cls="Body", dependency="Head", file=head.name)
+    )
+    tail = tmp_path / "tail.animation.py"
+    tail.write_text(
+        DEPENDENT.format(name="tail", cls="Tail", dependency="Body", file=body.name)
+    )
+    eye = tmp_path / "eye.animation.py"
+    eye.write_text(ANIMATION.format(name="eye", cls="Eye"))
+    return head, body, tail, eye
+
+
+def test_find_dependencies(files):
+    head, body, tail, eye = files
+
+    assert find_dependencies(head) == set()
+    assert find_dependencies(body) == {head.resolve()}
+    assert find_dependencies(tail) == {body.resolve()}
+
+
+class Test_DependencyGraph:
+    def test_affected(self, files):
+        head, body, tail, eye = files
+        graph = DependencyGraph.from_files(files)
+
+        assert graph.affected([head]) == {head.resolve(), body.resolve(), tail.resolve()}
+        assert graph.affected([tail]) == {tail.resolve()}
+        assert graph.affected([eye]) == {eye.resolve()}
+
+    def test_prerequisites(self, files):
+        head, body, tail, eye = files
+        graph = DependencyGraph.from_files(files)
+
+        assert graph.prerequisites(files) == {
+            head: set(),
+            body: {head},
+            tail: {head, body},
+            eye: set(),
+        }
+
+    def test_prerequisites_through_other_files(self, files):
+        head, body, tail, eye = files
+        graph = DependencyGraph.from_files(files)
+
+        assert graph.prerequisites([tail, head]) == {tail: {head}, head: set()}
+
+    def test_circular_dependency(self):
+        graph = DependencyGraph()
+        graph.add(Path("a"), [Path("b")])
+        graph.add(Path("b"), [Path("c")])
+        graph.add(Path("c"), [Path("a")])
+
+        with pytest.raises(GeneratorError, match="Circular dependency"):
+            graph.prerequisites([Path("a"), Path("b")])
+
+    def test_recorded_dependencies(self, files, tmp_path: Path):
+        head, body, tail, eye = files
+        cache = AnimationCache(tmp_path / "cache")
+        generator.load_animations_from_file(eye, cache)
+
+        # Only mentions the path, the recorded dependencies take precedence over scanning
+        eye.write_text(eye.read_text() + '\nNOTE = "head.animation.py"\n')
+        generator.load_animations_from_file(eye, cache)
+
+        assert find_dependencies(eye) == {head.resolve()}
+        assert cache.dependencies(eye) == set()
+        assert DependencyGraph.from_files([eye], cache).dependencies == {eye.resolve(): set()}
+
+
+class Test_load_animations:
+    def test_nested_loads_share_cache(self, files, tmp_path: Path):
+        head, body, tail, eye = files
+        cache = AnimationCache(tmp_path / "cache")
+
+        generator.load_animations_from_file(tail, cache)
+
+        assert cache.dependencies(head) == set()
+        assert cache.dependencies(body) == {head.resolve()}
+        assert cache.dependencies(tail) == {head.resolve(), body.resolve()}
+
+    def test_parallel(self, files, tmp_path: Path):
+        head, body, tail, eye = files
+        cache = AnimationCache(tmp_path / "cache")
+
+        animations = generator.load_animations(tmp_path, cache, jobs=2)
+
+        assert animations["Head"].end == 10
+        assert animations["Body"].end == 11
+        assert animations["Tail"].end == 12
+        assert animations["Eye"].end == 10
+        assert all(cache.dependencies(f) is not None for f in files)
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_dependency_states_with_cache(self, jobs, tmp_path: Path):
+        Path(tmp_path, "head.animation.py").write_text(
+            ANIMATION.format(name="head", cls="Head")
+        )
+        Path(tmp_path, "body.animation.py").write_text(USES_STATES)
+        cache = AnimationCache(tmp_path / "cache")
+
+        # Cold cache, warm cache, then only the head is cached
+        for edit in (False, False, True):
+            if edit:
+                Path(tmp_path, "body.animation.py").write_text(USES_STATES + "\n")
+            animations = generator.load_animations(tmp_path, cache, jobs)
+            assert animations["Body"].frames == [{"index": 0, "time": 10}]
+            assert animations["Head"].end == 10
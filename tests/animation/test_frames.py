@@ -0,0 +1,159 @@
+import pickle
+
+import pytest
+from hypothesis import given, settings
+from hypothesis.strategies import builds, integers, lists
+
+from mcanitexgen.animation.frames import FrameStore, RawFrameStore
+from mcanitexgen.animation.generator import TextureAnimation
+
+
+def frame(index: int, time: int):
+    return {"index": index, "time": time}
+
+
+class Test_init:
+    def test_from_dicts(self):
+        store = FrameStore([frame(0, 10), frame(3, 5)])
+
+        assert list(store.indices) == [0, 3]
+        assert list(store.times) == [10, 5]
+        assert list(store) == [frame(0, 10), frame(3, 5)]
+
+    def test_empty(self):
+        store = FrameStore()
+
+        assert len(store) == 0
+        assert not store
+        assert list(store) == []
+
+
+class Test_append_and_extend:
+    def test_append(self):
+        store = FrameStore()
+        store.append(1, 10)
+        store.append(2, 5)
+
+        assert store == [frame(1, 10), frame(2, 5)]
+
+    def test_extend(self):
+        store = FrameStore([frame(0, 1)])
+        store.extend(FrameStore([frame(1, 2), frame(2, 3)]))
+        store.extend(FrameStore())
+
+        assert store == [frame(0, 1), frame(1, 2), frame(2, 3)]
+
+    def test_extend_last(self):
+        store = FrameStore([frame(0, 1), frame(1, 2)])
+        store.extend_last(10)
+
+        assert store == [frame(0, 1), frame(1, 12)]
+
+
+class Test_mul:
+    def test(self):
+        store = FrameStore([frame(0, 1), frame(1, 2)])
+
+        assert list(store * 3) == [frame(0, 1), frame(1, 2)] * 3
+        assert list(store) == [frame(0, 1), frame(1, 2)]
+
+    def test_single_frame(self):
+        assert list(FrameStore([frame(0, 2)]) * 5) == [frame(0, 10)]
+        assert list(RawFrameStore([frame(0, 2)]) * 2) == [frame(0, 2), frame(0, 2)]
+
+    def test_merge_repetitions(self):
+        store = FrameStore([frame(0, 1), frame(1, 2), frame(0, 3)])
+
+        assert list(store * 2) == [
+            frame(0, 1),
+            frame(1, 2),
+            frame(0, 4),
+            frame(1, 2),
+            frame(0, 3),
+        ]
+        assert isinstance(store * 2, FrameStore)
+
+    @given(lists(builds(frame, integers(0, 2), integers(1, 10)), min_size=1), integers(1, 5))
+    @settings(max_examples=30)
+    def test_matches_raw_store(self, frames, times):
+        merged = FrameStore(frames) * times
+        raw = RawFrameStore(frames) * times
+
+        assert list(merged) == list(raw.runs())
+
+
+class Test_coalesce:
+    def test_append(self):
+        store = FrameStore()
+        store.append(0, 10)
+        store.append(0, 5)
+        store.append(1, 5)
+
+        assert list(store) == [frame(0, 15), frame(1, 5)]
+
+    def test_extend(self):
+        store = FrameStore([frame(1, 1), frame(0, 2)])
+        store.extend(FrameStore([frame(0, 3), frame(2, 4)]))
+
+        assert list(store) == [frame(1, 1), frame(0, 5), frame(2, 4)]
+
+    def test_extend_with_raw_store(self):
+        store = FrameStore([frame(0, 2)])
+        store.extend(RawFrameStore([frame(0, 3), frame(0, 4), frame(1, 1)]))
+
+        assert list(store) == [frame(0, 9), frame(1, 1)]
+
+    def test_raw_store(self):
+        store = RawFrameStore([frame(0, 1), frame(0, 2)])
+        store.append(0, 3)
+        store.extend(RawFrameStore([frame(0, 4)]))
+
+        assert list(store) == [frame(0, 1), frame(0, 2), frame(0, 3), frame(0, 4)]
+
+
+class Test_getitem:
+    @pytest.mark.parametrize(
+        "i, expected", [(0, frame(0, 1)), (1, frame(1, 2)), (-1, frame(1, 2))]
+    )
+    def test(self, i, expected):
+        assert FrameStore([frame(0, 1), frame(1, 2)])[i] == expected
+
+
+class Test_eq:
+    def test_compare_with_store(self):
+        assert FrameStore([frame(0, 1)]) == FrameStore([frame(0, 1)])
+        assert FrameStore([frame(0, 1)]) != FrameStore([frame(0, 2)])
+
+    def test_compare_with_list(self):
+        assert FrameStore([frame(0, 1)]) == [frame(0, 1)]
+        assert FrameStore([frame(0, 1)]) != [frame(1, 1)]
+        assert FrameStore([frame(0, 3)]) == [frame(0, 1), frame(0, 2)]
+        assert RawFrameStore([frame(0, 3)]) != [frame(0, 1), frame(0, 2)]
+
+
+class Test_runs:
+    @pytest.mark.parametrize(
+        "frames, expected_frames",
+        [
+            ([], []),
+            ([frame(0, 10), frame(0, 10)], [frame(0, 20)]),
+            (
+                [frame(1, 10), frame(0, 20), frame(0, 1), frame(2, 20)],
+                [frame(1, 10), frame(0, 21), frame(2, 20)],
+            ),
+        ],
+    )
+    def test(self, frames, expected_frames):
+        assert list(RawFrameStore(frames).runs()) == expected_frames
+
+    @given(lists(builds(frame, integers(0, 5), integers(1, 1000))))
+    @settings(max_examples=30)
+    def test_matches_combine_consecutive_frames(self, frames):
+        assert list(RawFrameStore(frames).runs()) == list(
+            TextureAnimation.combine_consecutive_frames(frames)
+        )
+
+
+def test_pickle():
+    store = FrameStore([frame(0, 1), frame(4, 20)])
+    assert pickle.loads(pickle.dumps(store)) == store
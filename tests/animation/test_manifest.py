@@ -0,0 +1,158 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from mcanitexgen.animation import generator
+from mcanitexgen.animation.dependencies import DependencyGraph
+from mcanitexgen.animation.manifest import Manifest
+
+ANIMATION = """
+from mcanitexgen.animation import Sequence, State, TextureAnimation, animation
+
+@animation("{texture}.png")
+class {cls}(TextureAnimation):
+    A = State(0)
+
+    main = Sequence(A(duration={duration}))
+"""
+
+
+def write_animation(path: Path, texture: str, cls: str, duration: int = 10):
+    path.write_text(ANIMATION.format(texture=texture, cls=cls, duration=duration))
+    return path
+
+
+def build(manifest: Manifest, files: List[Path]):
+    """ Generates the outdated files like the generate command """
+
+    graph = DependencyGraph.from_files(files)
+    loaded = generator.load_animation_files(manifest.outdated(files, graph))
+    for animations in loaded.values():
+        generator.write_mcmeta_files(animations, manifest.directory)
+
+    deleted = manifest.update(loaded)
+    deleted.extend(manifest.remove_missing_sources())
+    manifest.save()
+
+    return list(loaded), deleted
+
+
+@pytest.fixture
+def src(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    write_animation(src / "a.animation.py", "a", "A")
+    write_animation(src / "b.animation.py", "b", "B")
+    return src
+
+
+@pytest.fixture
+def out(tmp_path: Path):
+    out = tmp_path / "out"
+    out.mkdir()
+    return out
+
+
+def load_and_build(src: Path, out: Path, settings=None):
+    return build(Manifest.load(out, settings), sorted(generator.find_animation_files(src)))
+
+
+class Test_Manifest:
+    def test_skip_up_to_date(self, src: Path, out: Path):
+        loaded, _ = load_and_build(src, out)
+        assert loaded == [src / "a.animation.py", src / "b.animation.py"]
+
+        loaded, _ = load_and_build(src, out)
+        assert loaded == []
+
+    def test_changed_source(self, src: Path, out: Path):
+        load_and_build(src, out)
+        write_animation(src / "b.animation.py", "b", "B", duration=20)
+
+        loaded, _ = load_and_build(src, out)
+        assert loaded == [src / "b.animation.py"]
+
+    def test_changed_output(self, src: Path, out: Path):
+        load_and_build(src, out)
+        (out / "a.png.mcmeta").write_text("{}")
+
+        loaded, _ = load_and_build(src, out)
+        assert loaded == [src / "a.animation.py"]
+        assert (out / "a.png.mcmeta").read_text() != "{}"
+
+    def test_changed_settings(self, src: Path, out: Path):
+        load_and_build(src, out)
+
+        loaded, _ = load_and_build(src, out, {"indent": "\t"})
+        assert len(loaded) == 2
+
+    def test_delete_removed_animation(self, src: Path, out: Path):
+        load_and_build(src, out)
+        write_animation(src / "b.animation.py", "c", "C")
+
+        _, deleted = load_and_build(src, out)
+        assert deleted == [(out / "b.png.mcmeta").resolve()]
+        assert sorted(p.name for p in out.iterdir()) == [
+            Manifest.filename,
+            "a.png.mcmeta",
+            "c.png.mcmeta",
+        ]
+
+    def test_delete_outputs_of_removed_file(self, src: Path, out: Path):
+        load_and_build(src, out)
+        (src / "b.animation.py").unlink()
+
+        _, deleted = load_and_build(src, out)
+        assert deleted == [(out / "b.png.mcmeta").resolve()]
+        assert Manifest.load(out).sources.keys() == {(src / "a.animation.py").resolve()}
+
+    def test_keep_modified_outputs(self, src: Path, out: Path):
+        load_and_build(src, out)
+        (out / "b.png.mcmeta").write_text("{}")
+        (src / "b.animation.py").unlink()
+
+        _, deleted = load_and_build(src, out)
+        assert deleted == []
+        assert (out / "b.png.mcmeta").is_file()
+
+    def test_keep_output_taken_over_by_other_file(self, src: Path, out: Path):
+        load_and_build(src, out)
+        (src / "b.animation.py").unlink()
+        write_animation(src / "c.animation.py", "b", "C")
+
+        _, deleted = load_and_build(src, out)
+        assert deleted == []
+        assert (out / "b.png.mcmeta").is_file()
+
+    def test_keep_output_of_moved_animation(self, src: Path, out: Path):
+        load_and_build(src, out)
+        write_animation(src / "a.animation.py", "c", "C")
+        write_animation(src / "b.animation.py", "a", "A")
+
+        loaded, deleted = load_and_build(src, out)
+        assert len(loaded) == 2
+        assert deleted == [(out / "b.png.mcmeta").resolve()]
+        assert sorted(p.name for p in out.iterdir()) == [
+            Manifest.filename,
+            "a.png.mcmeta",
+            "c.png.mcmeta",
+        ]
+
+        loaded, deleted = load_and_build(src, out)
+        assert (loaded, deleted) == ([], [])
+
+    def test_missing_output(self, src: Path, out: Path):
+        manifest = Manifest.load(out)
+        files = sorted(generator.find_animation_files(src))
+        manifest.update(generator.load_animation_files(files))
+        manifest.save()
+
+        loaded, _ = load_and_build(src, out)
+        assert len(loaded) == 2
+
+    def test_corrupt_manifest(self, src: Path, out: Path):
+        load_and_build(src, out)
+        Path(out, Manifest.filename).write_text("[]")
+
+        assert Manifest.load(out).sources == {}
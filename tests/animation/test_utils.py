@@ -88,3 +88,18 @@ class Test_DurationDistributor:
 
         with pytest.raises(Exception, match="Trying to take from empty Distributor"):
             distributor.take(5)
+
+
+class Test_file_has_content:
+    @pytest.mark.parametrize(
+        "content, expected",
+        [(b"abc", True), (b"abd", False), (b"ab", False), (b"", False)],
+    )
+    def test(self, content, expected, tmp_path):
+        path = tmp_path / "file"
+        path.write_bytes(b"abc")
+
+        assert utils.file_has_content(path, content) == expected
+
+    def test_missing_file(self, tmp_path):
+        assert not utils.file_has_content(tmp_path / "missing", b"")
@@ -0,0 +1,72 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from mcanitexgen.animation.watch import FileWatcher
+
+
+@pytest.fixture
+def src(tmp_path: Path):
+    Path(tmp_path, "a.animation.py").write_text("a")
+    Path(tmp_path, "b.animation.py").write_text("b")
+    Path(tmp_path, "a.png").write_text("")
+    return tmp_path
+
+
+def touch(path: Path, content: str):
+    path.write_text(content)
+    # Make sure the change is visible on filesystems with coarse timestamps
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+
+
+class Test_poll:
+    def test_no_changes(self, src: Path):
+        assert FileWatcher(src).poll() == set()
+
+    def test_changes(self, src: Path):
+        watcher = FileWatcher(src)
+        touch(src / "a.animation.py", "changed")
+        (src / "b.animation.py").unlink()
+        touch(src / "c.animation.py", "c")
+        touch(src / "a.png", "ignored")
+
+        assert watcher.poll() == {
+            src / "a.animation.py",
+            src / "b.animation.py",
+            src / "c.animation.py",
+        }
+        assert watcher.poll() == set()
+
+    def test_single_file(self, src: Path):
+        watcher = FileWatcher(src / "a.animation.py")
+        touch(src / "b.animation.py", "changed")
+        assert watcher.poll() == set()
+
+        touch(src / "a.animation.py", "changed")
+        assert watcher.poll() == {src / "a.animation.py"}
+
+
+class Test_wait_for_changes:
+    def test_debounce_burst(self, src: Path):
+        # Each sleep simulates another save of the burst
+        saves = [
+            lambda: None,
+            lambda: touch(src / "a.animation.py", "1"),
+            lambda: touch(src / "b.animation.py", "2"),
+        ]
+        sleeps = []
+
+        def sleep(seconds: float):
+            sleeps.append(seconds)
+            if saves:
+                saves.pop(0)()
+
+        watcher = FileWatcher(src, interval=1, debounce=0.5, sleep=sleep)
+
+        assert watcher.wait_for_changes() == {src / "a.animation.py", src / "b.animation.py"}
+        assert sleeps == [1, 1, 0.5, 0.5]
+
+    def test_timeout(self, src: Path):
+        watcher = FileWatcher(src, interval=0.01)
+        assert watcher.wait_for_changes(timeout=0.05) == set()
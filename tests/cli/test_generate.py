@@ -6,6 +6,7 @@ from pytest_insta import SnapshotFixture
 from typer.testing import CliRunner
 
 from mcanitexgen import cli
+from mcanitexgen.animation import GeneratorError
 
 
 @pytest.fixture
@@ -95,3 +96,67 @@ class Test_indent_option:
 
                 mock_write.assert_called_once()
                 assert mock_write.call_args_list[0][0][2] == indent
+
+
+def test_jobs_option(runner: CliRunner, tmp_path: Path):
+    with patch("mcanitexgen.cli.load_animation_files", return_value={}) as mock_load:
+        runner.invoke(
+            cli.app,
+            f"generate tests/animation/examples -o {tmp_path} -j 4",
+            catch_exceptions=False,
+        )
+
+        mock_load.assert_called_once()
+        assert mock_load.call_args_list[0][0][2] == 4
+
+
+def test_incremental(runner: CliRunner, tmp_path: Path):
+    command = f"generate tests/animation/examples/steve.animation.py -o {tmp_path}"
+
+    result = runner.invoke(cli.app, command, catch_exceptions=False)
+    assert (
+        "Wrote 1 .mcmeta file(s), 0 unchanged, 0 animation file(s) up to date" in result.stdout
+    )
+
+    result = runner.invoke(cli.app, command, catch_exceptions=False)
+    assert (
+        "Wrote 0 .mcmeta file(s), 0 unchanged, 1 animation file(s) up to date" in result.stdout
+    )
+    assert Path(tmp_path, "steve.png.mcmeta").is_file()
+
+
+@pytest.mark.parametrize("broken", ["0.animation.py", "b.animation.py"])
+def test_nothing_written_on_error(broken, runner: CliRunner, tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    Path(src, "a.animation.py").write_text(
+        Path("tests/animation/examples/steve.animation.py").read_text()
+    )
+    Path(src, broken).write_text(
+        "from mcanitexgen.animation import Sequence, State, TextureAnimation, animation\n"
+        "@animation('broken.png')\n"
+        "class Broken(TextureAnimation):\n"
+        "    A = State(0)\n"
+        "    main = Sequence(A(end=10), A(end=5))\n"
+    )
+
+    result = runner.invoke(cli.app, f"generate {src} -o {tmp_path / 'out'}")
+
+    assert isinstance(result.exception, GeneratorError)
+    assert list(Path(tmp_path, "out").iterdir()) == []
+
+
+def test_watch(runner: CliRunner, tmp_path: Path):
+    changes = [{Path("steve.animation.py")}, KeyboardInterrupt()]
+
+    with patch("mcanitexgen.cli.FileWatcher") as mock_watcher:
+        mock_watcher.return_value.wait_for_changes.side_effect = changes
+        result = runner.invoke(
+            cli.app,
+            f"generate tests/animation/examples/steve.animation.py -o {tmp_path} --watch",
+            catch_exceptions=False,
+        )
+
+    assert result.exit_code == 0
+    assert result.stdout.count("Wrote") == 2
+    assert "Changed: steve.animation.py" in result.stdout
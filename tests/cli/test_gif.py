@@ -1,6 +1,7 @@
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import PIL.Image
 import pytest
 from typer.testing import CliRunner
 
@@ -20,22 +21,22 @@ def test_file_doesnt_exist(runner: CliRunner):
 
 
 def test_steve(runner: CliRunner):
-    with patch("PIL.Image.open", new=MagicMock()) as mock_open:
-        with patch("mcanitexgen.gif.create_gif", new=MagicMock()) as mock_create_gif:
+    with patch("mcanitexgen.gif.generator.load_texture_sheet", new=MagicMock()) as mock_load:
+        with patch("mcanitexgen.gif.generator.create_gif", new=MagicMock()) as mock_create_gif:
             runner.invoke(
                 cli.app,
                 "gif tests/animation/examples/steve.animation.py",
                 catch_exceptions=False,
             )
 
-            mock_open.assert_called_once()
-            assert mock_open.call_args_list[0][0][0] == Path(
+            mock_load.assert_called_once()
+            assert mock_load.call_args_list[0][0][0] == Path(
                 "tests/animation/examples/steve.png"
             )
 
             mock_create_gif.assert_called_once()
             frames, texture, frametime, dest = mock_create_gif.call_args_list[0][0]
-            assert texture == mock_open.return_value
+            assert texture == mock_load.return_value
             assert dest == Path("tests/animation/examples/steve.gif")
 
 
@@ -48,27 +49,35 @@ class Test_out_arg:
         ],
     )
     def test_out_dir(self, out, expected_dest, runner: CliRunner):
-        with patch("PIL.Image.open", new=MagicMock()) as mock_open:
-            with patch("mcanitexgen.gif.create_gif", new=MagicMock()) as mock_create_gif:
+        with patch(
+            "mcanitexgen.gif.generator.load_texture_sheet", new=MagicMock()
+        ) as mock_load:
+            with patch(
+                "mcanitexgen.gif.generator.create_gif", new=MagicMock()
+            ) as mock_create_gif:
                 runner.invoke(
                     cli.app,
                     f"gif tests/animation/examples/steve.animation.py -o {out}",
                     catch_exceptions=False,
                 )
 
-                mock_open.assert_called_once()
-                assert mock_open.call_args_list[0][0][0] == Path(
+                mock_load.assert_called_once()
+                assert mock_load.call_args_list[0][0][0] == Path(
                     "tests/animation/examples/steve.png"
                 )
 
                 mock_create_gif.assert_called_once()
                 frames, texture, frametime, dest = mock_create_gif.call_args_list[0][0]
-                assert texture == mock_open.return_value
+                assert texture == mock_load.return_value
                 assert dest == Path(expected_dest)
 
     def test_defaults_to_parent_of_file(self, runner: CliRunner):
-        with patch("PIL.Image.open", new=MagicMock()) as mock_open:
-            with patch("mcanitexgen.gif.create_gif", new=MagicMock()) as mock_create_gif:
+        with patch(
+            "mcanitexgen.gif.generator.load_texture_sheet", new=MagicMock()
+        ) as mock_load:
+            with patch(
+                "mcanitexgen.gif.generator.create_gif", new=MagicMock()
+            ) as mock_create_gif:
 
                 runner.invoke(
                     cli.app,
@@ -80,3 +89,173 @@ class Test_out_arg:
                 assert mock_create_gif.call_args_list[0][0][3] == Path(
                     "tests/animation/examples/steve.gif"
                 )
+
+
+class Test_format_arg:
+    @pytest.mark.parametrize(
+        "format, expected_dest", [("gif", "steve.gif"), ("apng", "steve.apng")]
+    )
+    def test_extension(self, format, expected_dest, runner: CliRunner):
+        with patch("mcanitexgen.gif.generator.load_texture_sheet", new=MagicMock()):
+            with patch(
+                "mcanitexgen.gif.generator.create_gif", new=MagicMock()
+            ) as mock_create_gif:
+                runner.invoke(
+                    cli.app,
+                    f"gif tests/animation/examples/steve.animation.py -o . --format {format}",
+                    catch_exceptions=False,
+                )
+
+                mock_create_gif.assert_called_once()
+                assert mock_create_gif.call_args_list[0][0][3] == Path(expected_dest)
+                assert mock_create_gif.call_args_list[0][1]["format"] == format
+
+    def test_unknown_format(self, runner: CliRunner):
+        with patch("mcanitexgen.gif.generator.create_gif", new=MagicMock()) as mock_create_gif:
+            result = runner.invoke(
+                cli.app,
+                "gif tests/animation/examples/steve.animation.py --format bmp",
+                catch_exceptions=False,
+            )
+
+        assert result.exit_code == 2
+        assert "Unknown format 'bmp'" in result.stdout
+        mock_create_gif.assert_not_called()
+
+    def test_write_apng(self, runner: CliRunner, tmp_path: Path):
+        result = runner.invoke(
+            cli.app,
+            f"gif examples/steve/steve.animation.py -o {tmp_path} -f apng",
+            catch_exceptions=False,
+        )
+
+        assert result.exit_code == 0
+        assert PIL.Image.open(tmp_path / "steve.apng").n_frames == 12
+
+
+class Test_directory:
+    def test_opens_each_texture_once(self, runner: CliRunner):
+        with patch(
+            "mcanitexgen.gif.generator.load_texture_sheet", new=MagicMock()
+        ) as mock_load:
+            with patch(
+                "mcanitexgen.gif.generator.create_gif", new=MagicMock()
+            ) as mock_create_gif:
+                result = runner.invoke(
+                    cli.app, "gif tests/animation/examples -o .", catch_exceptions=False
+                )
+
+        assert result.exit_code == 0
+        textures = sorted(call[0][0].name for call in mock_load.call_args_list)
+        assert textures == ["dream.png", "head.png", "steve.png", "tail_and_hindlegs.png"]
+        assert mock_create_gif.call_count == 8
+
+    def test_defaults_to_directory(self, runner: CliRunner):
+        with patch("mcanitexgen.gif.generator.load_texture_sheet", new=MagicMock()):
+            with patch(
+                "mcanitexgen.gif.generator.create_gif", new=MagicMock()
+            ) as mock_create_gif:
+                runner.invoke(cli.app, "gif tests/animation/examples", catch_exceptions=False)
+
+        dests = {call[0][3] for call in mock_create_gif.call_args_list}
+        assert Path("tests/animation/examples/steve.gif") in dests
+        assert Path("tests/animation/examples/head.gif") in dests
+
+    def test_jobs(self, runner: CliRunner, tmp_path: Path):
+        result = runner.invoke(
+            cli.app, f"gif examples -o {tmp_path} -j 2", catch_exceptions=False
+        )
+
+        assert result.exit_code == 0
+        assert sorted(f.name for f in tmp_path.iterdir()) == [
+            "dream.gif",
+            "head.gif",
+            "steve.gif",
+            "tail_and_hindlegs.gif",
+        ]
+        assert PIL.Image.open(tmp_path / "steve.gif").n_frames == 12
+
+
+class Test_range_args:
+    def invoke(
+        self, runner: CliRunner, args: str, file="tests/animation/examples/dog.animation.py"
+    ):
+        with patch("mcanitexgen.gif.generator.load_texture_sheet", new=MagicMock()):
+            with patch(
+                "mcanitexgen.gif.generator.create_gif", new=MagicMock()
+            ) as mock_create_gif:
+                result = runner.invoke(cli.app, f"gif {file} -o . {args}")
+
+        gifs = {call[0][3].name: call for call in mock_create_gif.call_args_list}
+        return result, gifs
+
+    def test_mark(self, runner: CliRunner):
+        result, gifs = self.invoke(runner, "--mark peek_while_sleeping")
+
+        assert result.exit_code == 0
+        assert list(gifs) == ["head.gif"]
+        frames = gifs["head.gif"][0][0]
+        assert sum(f["time"] for f in frames) == 25
+        assert {f["index"] for f in frames} == {5}
+
+    def test_missing_mark(self, runner: CliRunner):
+        result, gifs = self.invoke(runner, "--mark missing")
+
+        assert result.exit_code == 2
+        assert "No animation has a mark 'missing'" in result.stdout
+        assert gifs == {}
+
+    def test_ticks(self, runner: CliRunner):
+        result, gifs = self.invoke(runner, "--start 900 --end 1000")
+
+        assert result.exit_code == 0
+        assert len(gifs) == 3
+        for args, kwargs in gifs.values():
+            assert sum(f["time"] for f in args[0]) == 100
+
+    def test_whole_animation(self, runner: CliRunner):
+        result, gifs = self.invoke(runner, "")
+
+        assert result.exit_code == 0
+        frames, texture, frametime, dest = gifs["head.gif"][0]
+        assert sum(f["time"] for f in frames) == 2074
+        assert gifs["head.gif"][1] == {"format": "gif", "speed": 1.0}
+
+    def test_speed(self, runner: CliRunner):
+        result, gifs = self.invoke(runner, "--speed 2.5")
+
+        assert result.exit_code == 0
+        assert gifs["head.gif"][1]["speed"] == 2.5
+
+    @pytest.mark.parametrize(
+        "args, expected_error",
+        [
+            ("--speed 0", "Speed must be positive"),
+            ("--start 10 --end 5", "End '5' is before the start '10'"),
+            ("--mark asleep --start 10", "Can't be combined with --start or --end"),
+            ("--start -1", "-1 is smaller than the minimum"),
+        ],
+    )
+    def test_invalid(self, args, expected_error, runner: CliRunner):
+        result, gifs = self.invoke(runner, args)
+
+        assert result.exit_code == 2
+        assert expected_error in result.stdout
+        assert gifs == {}
+
+    def test_write_mark(self, runner: CliRunner, tmp_path: Path):
+        result = runner.invoke(
+            cli.app,
+            f"gif examples/dog/dog.animation.py -o {tmp_path} --mark asleep --speed 2",
+            catch_exceptions=False,
+        )
+
+        assert result.exit_code == 0
+        assert sorted(f.name for f in tmp_path.iterdir()) == ["head.gif"]
+        with PIL.Image.open(tmp_path / "head.gif") as gif:
+            durations = []
+            for i in range(gif.n_frames):
+                gif.seek(i)
+                durations.append(gif.info["duration"])
+        # 600 ticks at twice the speed
+        assert sum(durations) == 15000
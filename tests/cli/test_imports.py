@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import pytest
+
+import mcanitexgen
+
+HEAVY_PACKAGES = {"PIL", "numpy", "concurrent"}
+
+
+def imported_modules(statement: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.split("|")[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+@pytest.mark.parametrize(
+    "statement",
+    ["import mcanitexgen", "import mcanitexgen.cli", "import mcanitexgen.__main__"],
+)
+def test_no_heavy_imports(statement: str):
+    modules = imported_modules(statement)
+
+    assert "mcanitexgen" in modules
+    assert {m for m in modules if m.split(".")[0] in HEAVY_PACKAGES} == set()
+
+
+def test_gif_is_imported_on_access():
+    # Run in a new interpreter, other tests may already have imported mcanitexgen.gif
+    subprocess.run(
+        [sys.executable, "-c", "import mcanitexgen; mcanitexgen.gif.create_gif"], check=True
+    )
+
+    with pytest.raises(AttributeError):
+        mcanitexgen.doesnt_exist
@@ -0,0 +1,212 @@
+import os
+import socket
+import stat
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from mcanitexgen import cli, daemon
+from mcanitexgen.animation.cache import MemoryAnimationCache
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Needs Unix sockets")
+
+HEAD = """
+from mcanitexgen.animation import Sequence, State, TextureAnimation, animation
+
+@animation("head.png")
+class Head(TextureAnimation):
+    A = State(0)
+
+    main = Sequence(A(duration=10))
+"""
+
+BODY = """
+from pathlib import Path
+
+from mcanitexgen.animation import Sequence, TextureAnimation, animation
+from mcanitexgen.animation.generator import load_animations_from_file
+
+Head = load_animations_from_file(Path(__file__).parent / "a.animation.py")["Head"]
+
+@animation("body.png")
+class Body(TextureAnimation):
+    main = Sequence(Head.A(duration=Head.end))
+"""
+
+
+@pytest.fixture
+def server(tmp_path: Path):
+    socket_path = tmp_path / "d.sock"
+    server = daemon.DaemonServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield socket_path
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def default_socket(tmp_path: Path, monkeypatch):
+    """ Makes the default socket path point into a temp directory of the test """
+
+    monkeypatch.delenv("MCANITEXGEN_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(cli, "default_cache", None)
+    return daemon.default_socket_path()
+
+
+def other_user(monkeypatch):
+    monkeypatch.setattr(os, "getuid", lambda uid=os.getuid(): uid + 1)
+
+
+class Test_default_socket_path:
+    def test_env(self, monkeypatch):
+        monkeypatch.setenv("MCANITEXGEN_SOCKET", "/some/d.sock")
+        assert daemon.default_socket_path() == Path("/some/d.sock")
+
+    def test_runtime_dir(self, monkeypatch):
+        monkeypatch.delenv("MCANITEXGEN_SOCKET", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+        assert daemon.default_socket_path() == Path("/run/user/1000/mcanitexgen.sock")
+
+    def test_private_directory_in_temp(self, default_socket: Path, tmp_path: Path):
+        assert default_socket == Path(tmp_path, f"mcanitexgen-{os.getuid()}", "daemon.sock")
+
+
+class Test_run_command:
+    def test_generate(self, tmp_path: Path):
+        response = daemon.run_command(
+            ["generate", "tests/animation/examples/steve.animation.py", "-o", str(tmp_path)],
+            os.getcwd(),
+        )
+
+        assert response["exit_code"] == 0
+        assert "Wrote 1 .mcmeta file(s)" in response["output"]
+        assert Path(tmp_path, "steve.png.mcmeta").is_file()
+
+    def test_relative_to_cwd(self, tmp_path: Path):
+        response = daemon.run_command(
+            ["check", "steve.animation.py"], "tests/animation/examples"
+        )
+
+        assert response == {
+            "exit_code": 0,
+            "output": "1 animation(s) generated without errors\n",
+        }
+
+    def test_dependency_with_memory_cache(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(cli, "default_cache", MemoryAnimationCache())
+        Path(tmp_path, "a.animation.py").write_text(HEAD)
+        body = Path(tmp_path, "b.animation.py")
+
+        # Cold cache, warm cache, then only the head is cached
+        for content in (BODY, BODY, BODY + "\n"):
+            body.write_text(content)
+            response = daemon.run_command(["check", str(tmp_path)], os.getcwd())
+            assert response == {
+                "exit_code": 0,
+                "output": "2 animation(s) generated without errors\n",
+            }
+
+    def test_usage_error(self):
+        response = daemon.run_command(["check", "doesnt_exist"], os.getcwd())
+
+        assert response["exit_code"] == 2
+        assert "does not exist" in response["output"]
+
+    def test_unsupported_command(self):
+        assert daemon.run_command(["serve"], os.getcwd())["exit_code"] == 2
+
+
+class Test_forward:
+    def test_no_daemon(self, tmp_path: Path):
+        assert daemon.forward(["check", "src"], tmp_path / "missing.sock") is None
+
+    @pytest.mark.parametrize(
+        "args",
+        [[], ["serve"], ["--version"], ["generate", "src", "--watch"], ["gif", "--help"]],
+    )
+    def test_not_forwarded(self, args, server: Path):
+        assert daemon.forward(args, server) is None
+
+    def test_forward(self, server: Path, capsys):
+        exit_code = daemon.forward(
+            ["check", "tests/animation/examples/dog.animation.py"], server
+        )
+
+        assert exit_code == 0
+        assert capsys.readouterr().out == "3 animation(s) generated without errors\n"
+
+    def test_socket_of_other_user(self, server: Path, monkeypatch, capsys):
+        other_user(monkeypatch)
+
+        assert daemon.forward(["check", "doesnt_exist"], server) is None
+        assert capsys.readouterr().out == ""
+
+    def test_not_a_socket(self, tmp_path: Path):
+        Path(tmp_path, "d.sock").touch()
+        assert daemon.forward(["check", "src"], tmp_path / "d.sock") is None
+
+    def test_forward_error(self, server: Path, capsys):
+        assert daemon.forward(["check", "doesnt_exist"], server) == 2
+        assert "does not exist" in capsys.readouterr().out
+
+
+class Test_serve:
+    def test_already_running(self, server: Path):
+        with pytest.raises(daemon.DaemonError, match="already listening"):
+            daemon.serve(server)
+
+    def test_uses_memory_cache(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(cli, "default_cache", None)
+        monkeypatch.setattr(daemon.DaemonServer, "serve_forever", lambda self: None)
+
+        daemon.serve(tmp_path / "d.sock")
+
+        assert isinstance(cli.default_cache, MemoryAnimationCache)
+        assert not Path(tmp_path, "d.sock").exists()
+
+    def test_remove_stale_socket(self, tmp_path: Path, monkeypatch):
+        monkeypatch.setattr(cli, "default_cache", None)
+        monkeypatch.setattr(daemon.DaemonServer, "serve_forever", lambda self: None)
+        Path(tmp_path, "d.sock").touch()
+
+        daemon.serve(tmp_path / "d.sock")
+
+    def test_socket_only_accessible_by_user(self, server: Path):
+        assert stat.S_IMODE(server.stat().st_mode) == 0o600
+
+    def test_create_private_directory(self, default_socket: Path, monkeypatch):
+        monkeypatch.setattr(daemon.DaemonServer, "serve_forever", lambda self: None)
+
+        daemon.serve()
+
+        assert stat.S_IMODE(default_socket.parent.stat().st_mode) == 0o700
+        assert not default_socket.exists()
+
+    def test_directory_accessible_by_others(self, default_socket: Path):
+        default_socket.parent.mkdir(mode=0o755)
+        os.chmod(default_socket.parent, 0o755)
+
+        with pytest.raises(daemon.DaemonError, match="must be a directory only you can"):
+            daemon.serve()
+
+    def test_directory_of_other_user(self, default_socket: Path, monkeypatch):
+        default_socket.parent.mkdir(mode=0o700)
+        other_user(monkeypatch)
+
+        with pytest.raises(daemon.DaemonError, match="must be a directory only you can"):
+            daemon.serve()
+
+    def test_socket_of_other_user(self, tmp_path: Path, monkeypatch):
+        Path(tmp_path, "d.sock").touch()
+        other_user(monkeypatch)
+
+        with pytest.raises(daemon.DaemonError, match="belongs to another user"):
+            daemon.serve(tmp_path / "d.sock")
+        assert Path(tmp_path, "d.sock").exists()
@@ -0,0 +1,133 @@
+from pathlib import Path
+
+import numpy as np
+import PIL.features
+import PIL.Image
+import pytest
+from PIL import ImageSequence
+
+from mcanitexgen.gif import formats, generator
+from mcanitexgen.gif.formats import FORMATS, AnimationFormat, get_format, register_format
+
+
+@pytest.fixture
+def states():
+    base = PIL.Image.new("RGBA", (16, 16), (200, 30, 30, 255))
+    square = base.copy()
+    square.paste((10, 10, 240, 255), (4, 4, 6, 6))
+    hole = base.copy()
+    hole.paste((0, 0, 0, 0), (10, 2, 12, 3))
+    return [base, square, hole]
+
+
+def normalized(im: PIL.Image.Image):
+    pixels = np.asarray(im.convert("RGBA")).copy()
+    pixels[pixels[..., 3] == 0] = 0  # The color of transparent pixels doesn't matter
+    return pixels
+
+
+def read_frames(path: Path):
+    return [
+        (normalized(f), f.info["duration"])
+        for f in ImageSequence.Iterator(PIL.Image.open(path))
+    ]
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "apng",
+        pytest.param(
+            "webp",
+            marks=pytest.mark.skipif(
+                not FORMATS["webp"].is_available(), reason="Pillow without WebP support"
+            ),
+        ),
+    ],
+)
+def test_lossless_formats(name, states, tmp_path: Path):
+    frames = [(0, 0.5), (1, 0.125), (0, 0.2), (2, 1), (1, 0.05)]
+    dest = tmp_path / f"test{FORMATS[name].extension}"
+
+    FORMATS[name].write(dest, states, frames)
+
+    actual = read_frames(dest)
+    assert [duration for _, duration in actual] == [500, 125, 200, 1000, 50]
+    for (im, _), (state, _) in zip(actual, frames):
+        assert np.array_equal(im, normalized(states[state]))
+
+
+def test_apng_long_frames(states, tmp_path: Path):
+    frames = [(0, 100), (1, 0.5), (0, 200)]
+
+    formats.write_apng(tmp_path / "test.apng", states, frames)
+
+    actual = read_frames(tmp_path / "test.apng")
+    assert [duration for _, duration in actual] == [
+        65535,
+        34465,
+        500,
+        65535,
+        65535,
+        65535,
+        3395,
+    ]
+    assert [np.array_equal(im, normalized(states[0])) for im, _ in actual] == [
+        True,
+        True,
+        False,
+        True,
+        True,
+        True,
+        True,
+    ]
+
+
+@pytest.mark.parametrize("num_states", [2, 8])
+def test_gif_is_lossless(num_states, tmp_path: Path):
+    # 64 colors per state, two states share a palette, eight states have too many colors
+    states = [
+        PIL.Image.fromarray(
+            np.array(
+                [[(s * 30, x // 4 * 60, y * 15, 255) for x in range(16)] for y in range(16)],
+                dtype=np.uint8,
+            )
+        )
+        for s in range(num_states)
+    ]
+    frames = [(i, 0.1) for i in range(num_states)] * 2
+
+    FORMATS["gif"].write(tmp_path / "test.gif", states, frames)
+
+    for (im, _), (state, _) in zip(read_frames(tmp_path / "test.gif"), frames):
+        assert np.array_equal(im, normalized(states[state]))
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="Unknown format 'bmp'"):
+        get_format("bmp")
+
+
+def test_unavailable_format(monkeypatch):
+    monkeypatch.setattr(PIL.features, "check", lambda feature: False)
+
+    with pytest.raises(ValueError, match="Format 'webp' isn't supported"):
+        get_format("webp")
+    assert get_format("apng") is FORMATS["apng"]
+
+
+def test_register_format(states, tmp_path: Path):
+    written = []
+    custom = AnimationFormat(
+        "custom", ".txt", lambda dest, states, frames: written.extend(frames), 10
+    )
+    register_format(custom)
+    try:
+        frames = [{"index": 0, "time": 3}, {"index": 1, "time": 2}]
+        texture = PIL.Image.new("RGBA", (16, 32))
+        generator.create_gif(frames, texture, 1, tmp_path / "test.txt", format="custom")
+    finally:
+        del FORMATS["custom"]
+
+    # Durations are whole tenths of a second
+    assert written == [(0, 0.2), (1, 0.1)]
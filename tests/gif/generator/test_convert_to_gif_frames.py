@@ -1,4 +1,6 @@
 import pytest
+from hypothesis import given
+from hypothesis.strategies import builds, integers, lists, sampled_from
 
 from mcanitexgen.gif import generator
 
@@ -39,3 +41,54 @@ def test_frametime(frames, frametime, expected_frames, expected_durations, state
 
     assert list(frames) == expected_frames
     assert list(durations) == expected_durations
+
+
+@pytest.mark.parametrize(
+    "frames, expected_frames, expected_durations",
+    [
+        ([frame(0, 1), frame(0, 2)], [0], [0.15]),
+        ([frame(0, 1), frame(0, 2), frame(1, 1), frame(0, 1)], [0, 1, 0], [0.15, 0.05, 0.05]),
+    ],
+)
+def test_merge_consecutive_frames(frames, expected_frames, expected_durations, states):
+    frames, durations = zip(*generator.convert_to_gif_frames(frames, states, 1))
+
+    assert list(frames) == expected_frames
+    assert list(durations) == expected_durations
+
+
+@pytest.mark.parametrize(
+    "speed, expected_durations", [(1, [0.5, 0.25]), (2, [0.25, 0.13]), (0.5, [1, 0.5])]
+)
+def test_speed(speed, expected_durations, states):
+    frames = [frame(0, 10), frame(1, 5)]
+    gif_frames = list(generator.convert_to_gif_frames(frames, states, 1, speed=speed))
+
+    assert gif_frames == [(0, expected_durations[0]), (1, expected_durations[1])]
+
+
+class Test_carry_remainders:
+    def test(self, states):
+        # A tick lasts 1.5 centiseconds
+        frames = [frame(0, 1), frame(1, 1), frame(0, 1), frame(1, 1)]
+        gif_frames = list(generator.convert_to_gif_frames(frames, states, 0.3))
+
+        assert gif_frames == [(0, 0.02), (1, 0.01), (0, 0.02), (1, 0.01)]
+
+    def test_skip_frames_shorter_than_half_a_centisecond(self, states):
+        frames = [frame(0, 1), frame(1, 1), frame(2, 1)]
+        gif_frames = list(generator.convert_to_gif_frames(frames, states, 0.08))
+
+        assert gif_frames == [(1, 0.01)]
+
+    @given(
+        lists(builds(frame, integers(0, 5), integers(1, 100)), min_size=1),
+        sampled_from([0.1, 0.3, 1, 1.7, 3]),
+    )
+    def test_total_time_is_exact(self, frames, frametime):
+        durations = [
+            d for _, d in generator.convert_to_gif_frames(frames, range(6), frametime)
+        ]
+
+        total_centiseconds = sum(f["time"] for f in frames) * 5 * frametime
+        assert sum(round(d * 100) for d in durations) == int(total_centiseconds + 0.5)
@@ -6,6 +6,7 @@ import pytest
 from pytest import approx
 
 from mcanitexgen.gif import generator
+from mcanitexgen.gif.texture import TextureSheet
 
 
 def frame(index: int, time: int):
@@ -23,17 +24,96 @@ def test():
     expected_frametime = 1
     expected_dest = Path("test.gif")
 
-    with patch("mcanitexgen.gif.images2gif.writeGif", new=MagicMock()) as mock_writeGif:
+    with patch("mcanitexgen.gif.formats.write_gif", new=MagicMock()) as mock_write_gif:
         generator.create_gif(frames, texture, expected_frametime, expected_dest)
 
-        mock_writeGif.assert_called_once()
-        dest, images, durations = mock_writeGif.call_args_list[0][0]
+        mock_write_gif.assert_called_once()
+        dest, states, gif_frames = mock_write_gif.call_args_list[0][0]
         assert dest == expected_dest
-        assert len(images) == len(frames)
-        assert len(durations) == len(frames)
-        assert durations == (approx(0.5), approx(0.6))
+        assert len(states) == 2
+        assert list(gif_frames) == [(0, approx(0.5)), (1, approx(0.6))]
+
+
+def test_only_shown_states(texture):
+    frames = [frame(3, 10), frame(1, 12), frame(3, 2)]
+    sheet = TextureSheet.from_image(texture)
+
+    with patch("mcanitexgen.gif.formats.write_gif", new=MagicMock()) as mock_write_gif:
+        generator.create_gif(frames, sheet, 1, Path("test.gif"))
+
+    dest, states, gif_frames = mock_write_gif.call_args_list[0][0]
+    assert states == [sheet[1], sheet[3]]
+    assert list(gif_frames) == [(1, approx(0.5)), (0, approx(0.6)), (1, approx(0.1))]
+    assert set(sheet._images) == {1, 3}
+
+
+def test_states_of_generator(texture):
+    frames = (frame(i, 1) for i in [2, 0])
+
+    with patch("mcanitexgen.gif.formats.write_gif", new=MagicMock()) as mock_write_gif:
+        generator.create_gif(frames, texture, 1, Path("test.gif"))
+
+    dest, states, gif_frames = mock_write_gif.call_args_list[0][0]
+    assert len(states) == 4
+    assert list(gif_frames) == [(2, approx(0.05)), (0, approx(0.05))]
+
+
+def test_write(texture, tmp_path: Path):
+    frames = [frame(0, 10), frame(1, 12), frame(0, 2)]
+
+    generator.create_gif(frames, texture, 1, tmp_path / "test.gif")
+
+    gif = PIL.Image.open(tmp_path / "test.gif")
+    assert gif.n_frames == 3
+    assert gif.size == (16, 16)
 
 
 def test_pass_no_frames(texture):
     with pytest.warns(UserWarning, match="No frames.*"):
         generator.create_gif([], texture, 1, Path("test.gif"))
+
+
+def test_frames_from_generator(texture, tmp_path: Path):
+    frames = (frame(i % 4, 1) for i in range(1000))
+
+    generator.create_gif(frames, texture, 1, tmp_path / "test.gif")
+
+    gif = PIL.Image.open(tmp_path / "test.gif")
+    assert gif.n_frames == 1000
+
+
+def test_pass_no_frames_from_generator(texture, tmp_path: Path):
+    with pytest.warns(UserWarning, match="No frames.*"):
+        generator.create_gif(iter([]), texture, 1, tmp_path / "test.gif")
+
+    assert not Path(tmp_path, "test.gif").exists()
+
+
+class Test_range:
+    def test_ticks(self, texture):
+        frames = [frame(0, 10), frame(1, 12), frame(2, 2), frame(3, 6)]
+
+        with patch("mcanitexgen.gif.formats.write_gif", new=MagicMock()) as mock_write_gif:
+            generator.create_gif(frames, texture, 1, Path("test.gif"), start=5, end=23)
+
+        dest, states, gif_frames = mock_write_gif.call_args_list[0][0]
+        assert len(states) == 3
+        assert list(gif_frames) == [(0, approx(0.25)), (1, approx(0.6)), (2, approx(0.05))]
+
+    def test_speed(self, texture):
+        frames = [frame(0, 10), frame(1, 12)]
+
+        with patch("mcanitexgen.gif.formats.write_gif", new=MagicMock()) as mock_write_gif:
+            generator.create_gif(frames, texture, 1, Path("test.gif"), speed=4)
+
+        dest, states, gif_frames = mock_write_gif.call_args_list[0][0]
+        assert list(gif_frames) == [(0, approx(0.13)), (1, approx(0.15))]
+
+    @pytest.mark.parametrize("speed", [0, -1])
+    def test_invalid_speed(self, speed, texture):
+        with pytest.raises(ValueError, match="Speed must be positive"):
+            generator.create_gif([frame(0, 1)], texture, 1, Path("test.gif"), speed=speed)
+
+    def test_no_frames_in_range(self, texture):
+        with pytest.warns(UserWarning, match="No frames.*"):
+            generator.create_gif([frame(0, 10)], texture, 1, Path("test.gif"), start=10)
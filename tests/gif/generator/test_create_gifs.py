@@ -0,0 +1,74 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import PIL.Image
+import pytest
+
+from mcanitexgen.animation.generator import GeneratorError
+from mcanitexgen.gif import generator
+
+
+def frame(index: int, time: int):
+    return {"index": index, "time": time}
+
+
+@pytest.fixture
+def textures(tmp_path: Path):
+    paths = []
+    for name, color in [("red.png", "red"), ("blue.png", "blue")]:
+        PIL.Image.new("RGBA", (16, 32), color).save(tmp_path / name)
+        paths.append(tmp_path / name)
+    return paths
+
+
+def test_opens_texture_once(textures, tmp_path: Path):
+    gifs = [([frame(0, 10), frame(1, 5)], 1, tmp_path / f"{i}.gif") for i in range(3)]
+
+    with patch("PIL.Image.open", wraps=PIL.Image.open) as mock_open:
+        generator.create_gifs({textures[0]: gifs})
+
+    mock_open.assert_called_once_with(textures[0])
+    for _, _, dest in gifs:
+        assert PIL.Image.open(dest).n_frames == 2
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_all_textures(jobs, textures, tmp_path: Path):
+    generator.create_gifs(
+        {
+            texture: [([frame(1, 4)], 1, tmp_path / f"{texture.stem}.gif")]
+            for texture in textures
+        },
+        jobs=jobs,
+    )
+
+    for texture in textures:
+        with PIL.Image.open(tmp_path / f"{texture.stem}.gif") as im:
+            assert (
+                im.convert("RGB").getpixel((0, 0))
+                == PIL.Image.open(texture).getpixel((0, 0))[:3]
+            )
+
+
+def test_errors_in_pool(textures, tmp_path: Path):
+    missing = tmp_path / "missing.png"
+    dest = tmp_path / "red.gif"
+
+    with pytest.raises(GeneratorError, match="1 texture") as e:
+        generator.create_gifs(
+            {
+                missing: [([frame(0, 1)], 1, tmp_path / "missing.gif")],
+                textures[0]: [([frame(0, 1)], 1, dest)],
+            },
+            jobs=2,
+        )
+
+    assert "missing.png" in str(e.value)
+    assert dest.exists()
+
+
+def test_format(textures, tmp_path: Path):
+    with patch("mcanitexgen.gif.generator.create_gif", new=MagicMock()) as mock_create_gif:
+        generator.create_gifs({textures[0]: [([], 1, tmp_path / "a.apng")]}, format="apng")
+
+    assert mock_create_gif.call_args[1] == {"format": "apng"}
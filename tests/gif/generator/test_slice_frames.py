@@ -0,0 +1,82 @@
+import pytest
+from hypothesis import given
+from hypothesis.strategies import builds, integers, lists, sampled_from
+
+from mcanitexgen.animation.frames import FrameStore, RawFrameStore
+from mcanitexgen.gif import generator
+
+
+def frame(index: int, time: int):
+    return {"index": index, "time": time}
+
+
+FRAMES = [frame(0, 10), frame(1, 5), frame(2, 20), frame(0, 5)]
+
+
+def as_list(frames):
+    return list(frames)
+
+
+def as_generator(frames):
+    return (f for f in frames)
+
+
+@pytest.fixture(params=[as_list, FrameStore, RawFrameStore, as_generator])
+def container(request):
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "start, end, expected_frames",
+    [
+        (0, None, FRAMES),
+        (0, 40, FRAMES),
+        (0, 100, FRAMES),
+        (10, 15, [frame(1, 5)]),
+        (10, None, [frame(1, 5), frame(2, 20), frame(0, 5)]),
+        (5, 12, [frame(0, 5), frame(1, 2)]),
+        (12, 13, [frame(1, 1)]),
+        (14, 36, [frame(1, 1), frame(2, 20), frame(0, 1)]),
+        (0, 0, []),
+        (15, 15, []),
+        (40, None, []),
+        (50, 60, []),
+    ],
+)
+def test_slice(start, end, expected_frames, container):
+    assert list(generator.slice_frames(container(FRAMES), start, end)) == expected_frames
+
+
+def test_generator_is_consumed_up_to_end():
+    consumed = []
+
+    def frames():
+        for f in FRAMES:
+            consumed.append(f)
+            yield f
+
+    assert list(generator.slice_frames(frames(), 0, 12)) == [frame(0, 10), frame(1, 2)]
+    assert consumed == FRAMES[:3]
+
+
+@pytest.mark.parametrize("start, end", [(-1, None), (10, 5)])
+def test_invalid_range(start, end):
+    with pytest.raises(ValueError, match=f"Invalid tick range from {start} to {end}"):
+        generator.slice_frames(FRAMES, start, end)
+
+
+@given(
+    lists(builds(frame, sampled_from(range(4)), integers(0, 20)), max_size=20),
+    integers(0, 250),
+    integers(0, 250),
+)
+def test_same_as_iterating(frames, start, length):
+    """ Binary search over sequences gives the same frames as going through an iterator """
+
+    end = start + length
+    expected = list(generator.slice_frames(iter(frames), start, end))
+
+    assert generator.slice_frames(frames, start, end) == expected
+    assert sum(f["time"] for f in expected) == max(
+        min(sum(f["time"] for f in frames), end) - start, 0
+    )
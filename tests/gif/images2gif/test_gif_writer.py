@@ -0,0 +1,47 @@
+import numpy as np
+import PIL.Image
+import pytest
+
+from mcanitexgen.gif.images2gif import GifWriter
+
+
+@pytest.fixture
+def rgba():
+    alpha = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    pixels = np.dstack([np.full((16, 16, 3), 200, dtype=np.uint8), alpha])
+    return PIL.Image.fromarray(pixels, "RGBA")
+
+
+def test_paste_transparency(rgba):
+    im = PIL.Image.new("P", rgba.size, 3)
+
+    GifWriter().pasteTransparency(im, rgba)
+
+    alpha = np.asarray(rgba)[..., 3]
+    assert np.array_equal(np.asarray(im) == 255, alpha <= 128)
+    assert np.all(np.asarray(im)[alpha > 128] == 3)
+
+
+def test_paste_transparency_without_alpha(rgba):
+    im = PIL.Image.new("P", rgba.size, 3)
+
+    GifWriter().pasteTransparency(im, rgba.convert("RGB"))
+
+    assert np.all(np.asarray(im) == 3)
+
+
+@pytest.mark.parametrize("nq", [0, 10])
+@pytest.mark.parametrize("dither", [False, True])
+def test_convert_images_to_pil(rgba, nq, dither):
+    writer = GifWriter()
+    writer.transparency = False
+
+    rgb = PIL.Image.new("RGB", (32, 32), "blue")
+    large = rgba.resize((32, 32))
+    converted = writer.convertImagesToPIL([large, rgb], dither, nq)
+
+    assert writer.transparency
+    assert [im.mode for im in converted] == ["P", "P"]
+    alpha = np.asarray(large)[..., 3]
+    assert np.array_equal(np.asarray(converted[0]) == 255, alpha <= 128)
+    assert not np.any(np.asarray(converted[1]) == 255)
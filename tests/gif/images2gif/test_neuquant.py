@@ -0,0 +1,63 @@
+import copy
+
+import numpy as np
+import PIL.Image
+import pytest
+
+from mcanitexgen.gif.images2gif import NeuQuant
+
+
+@pytest.fixture(scope="module")
+def image():
+    y, x = np.mgrid[0:64, 0:64]
+    rgb = np.stack([x * 4, y * 4, (x * y) % 256], axis=2)
+    alpha = np.full((64, 64, 1), 255)
+    return PIL.Image.fromarray(np.concatenate([rgb, alpha], axis=2).astype(np.uint8), "RGBA")
+
+
+def mean_error(image: PIL.Image.Image, quantizer: NeuQuant):
+    pixels = np.asarray(image)[..., :3].reshape(-1, 1, 3).astype(float)
+    palette = quantizer.colormap[None, :, :3].astype(float)
+    return np.sqrt(((pixels - palette) ** 2).sum(2).min(1)).mean()
+
+
+@pytest.mark.parametrize("samplefac", [1, 10])
+def test_batched_quality(image, samplefac):
+    reference = NeuQuant(image, samplefac, colors=255, batchsize=1)
+    batched = NeuQuant(image, samplefac, colors=255)
+
+    assert mean_error(image, batched) <= mean_error(image, reference) * 1.1
+
+
+def test_no_output(image, capsys):
+    NeuQuant(image, 10, batchsize=1)
+    NeuQuant(image, 10)
+
+    assert capsys.readouterr().out == ""
+
+
+def test_batched_fix_and_inxbuild(image):
+    reference = NeuQuant(image, 10, batchsize=1)
+    batched = copy.deepcopy(reference)
+
+    reference.fix()
+    reference.inxbuild()
+    batched.fixBatched()
+    batched.inxbuildBatched()
+
+    # Entries with the same green value may be ordered differently
+    assert np.array_equal(
+        np.unique(reference.colormap, axis=0), np.unique(batched.colormap, axis=0)
+    )
+    assert np.array_equal(reference.colormap[:, 1], batched.colormap[:, 1])
+    assert np.array_equal(reference.netindex, batched.netindex)
+
+
+def test_palette_image_padding(image):
+    quantizer = NeuQuant(image, 10, colors=255)
+
+    palette = quantizer.paletteImage().getpalette()
+    assert palette[255 * 3 : 256 * 3] == palette[0:3]
+
+    mapped = image.convert("RGB").quantize(palette=quantizer.paletteImage(), dither=0)
+    assert 255 not in mapped.getdata()
@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+import numpy as np
+import PIL.Image
+import pytest
+
+from mcanitexgen.gif.palette import PaletteMapper, map_to_palette, palette_mapper
+
+COLORS = [(0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 0, 255)]
+
+
+def brute_force(rgb: np.ndarray, colors) -> np.ndarray:
+    colors = np.array(colors)
+    distances = ((rgb[..., None, :].astype(int) - colors) ** 2).sum(-1)
+    return distances.argmin(-1)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 4096])
+def test_map(chunk_size):
+    rgb = np.random.default_rng(0).integers(0, 256, (32, 48, 3), dtype=np.uint8)
+    mapper = PaletteMapper(COLORS)
+    mapper.chunk_size = chunk_size
+
+    indices = mapper.map(rgb)
+    assert indices.shape == (32, 48)
+    assert np.array_equal(indices, brute_force(rgb, COLORS))
+
+
+def test_lowest_index_on_ties():
+    mapper = PaletteMapper([(10, 10, 10), (0, 0, 0), (0, 0, 0), (20, 20, 20)])
+    rgb = np.array([[(0, 0, 0), (15, 15, 15), (5, 5, 5)]], dtype=np.uint8)
+
+    assert mapper.map(rgb).tolist() == [[1, 0, 0]]
+
+
+def test_remembers_colors():
+    mapper = PaletteMapper(COLORS)
+    rgb = np.array([[(1, 2, 3), (250, 0, 10)]], dtype=np.uint8)
+
+    with patch.object(mapper, "_nearest", wraps=mapper._nearest) as mock_nearest:
+        first = mapper.map(rgb)
+        second = mapper.map(rgb[:, ::-1])
+        third = mapper.map(np.array([[(1, 2, 3), (0, 0, 250)]], dtype=np.uint8))
+
+    assert first.tolist() == [[0, 2]]
+    assert second.tolist() == [[2, 0]]
+    assert third.tolist() == [[0, 3]]
+    assert [len(call.args[0]) for call in mock_nearest.call_args_list] == [2, 1]
+
+
+def test_palette_mapper_is_shared():
+    colors = tuple(c for color in COLORS for c in color)
+    assert palette_mapper(colors) is palette_mapper(colors)
+    assert palette_mapper(colors) is not palette_mapper(colors[::-1])
+
+
+def test_map_to_palette():
+    palette = PIL.Image.new("P", (1, 1))
+    palette.putpalette([c for color in COLORS for c in color] * 64)
+    image = PIL.Image.new("RGBA", (4, 4), (200, 30, 30, 0))
+    image.paste((10, 10, 240, 255), (0, 0, 2, 4))
+
+    im = map_to_palette(image, palette)
+    assert im.mode == "P"
+    assert im.getpalette()[:12] == palette.getpalette()[:12]
+    assert np.array_equal(np.asarray(im), [[3, 3, 2, 2]] * 4)
@@ -0,0 +1,139 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import PIL.Image
+import pytest
+
+from mcanitexgen.gif.texture import TextureSheet, load_texture_sheet
+
+
+def striped_texture(width: int, num_states: int):
+    """ A texture whose state i is filled with the color (i, i, i, 255) """
+
+    texture = PIL.Image.new("RGBA", (width, width * num_states))
+    for i in range(num_states):
+        texture.paste((i, i, i, 255), (0, i * width, width, (i + 1) * width))
+    return texture
+
+
+@pytest.mark.parametrize(
+    "width, height, expected_num_states", [(1, 2, 2), (2, 2, 1), (4, 16, 4), (16, 128, 8)]
+)
+def test_number_of_states(width, height, expected_num_states):
+    img = PIL.Image.new("RGBA", (width, height), color="red")
+    sheet = TextureSheet.from_image(img)
+
+    assert len(sheet) == expected_num_states
+    assert len(list(sheet)) == expected_num_states
+
+
+@pytest.mark.parametrize(
+    "texture_size, expected_size", [((16, 512), (16, 16)), ((32, 128), (32, 32))]
+)
+def test_state_sizes(texture_size, expected_size):
+    img = PIL.Image.new("RGBA", texture_size, color="red")
+    sheet = TextureSheet.from_image(img)
+
+    for state in sheet:
+        assert state.size == expected_size
+
+
+@pytest.mark.parametrize("width", [3, 5, 9, 10, 100])
+def test_invalid_width(width):
+    img = PIL.Image.new("RGBA", (width, 2 * width), color="red")
+
+    with pytest.raises(ValueError, match=f"Texture width '{width}' is not power of 2"):
+        TextureSheet.from_image(img)
+
+
+@pytest.mark.parametrize("width, height", [(16, 31), (16, 127)])
+def test_height_is_not_multiple_of_width(width, height):
+    img = PIL.Image.new("RGBA", (width, height), color="red")
+
+    with pytest.raises(
+        ValueError,
+        match=f"Texture height '{height}' is not multiple of its width '{width}'",
+    ):
+        TextureSheet.from_image(img)
+
+
+@pytest.mark.parametrize("width, num_states", [(16, 1), (16, 2), (32, 4)])
+def test_states(width, num_states):
+    texture = striped_texture(width, num_states)
+    sheet = TextureSheet.from_image(texture)
+
+    for i, state in enumerate(sheet):
+        expected = texture.crop((0, i * width, width, (i + 1) * width))
+        assert np.array_equal(np.asarray(state), np.asarray(expected))
+
+
+def test_states_are_views():
+    sheet = TextureSheet.from_image(striped_texture(16, 4))
+
+    state = sheet[2]
+    assert np.shares_memory(sheet.state_pixels(2), sheet.pixels)
+
+    # Changes to the sheet show up in the images of its states
+    sheet.pixels[32:48] = 7
+    assert state.getpixel((0, 0)) == (7, 7, 7, 7)
+
+
+def test_states_are_created_on_access():
+    sheet = TextureSheet.from_image(striped_texture(16, 4))
+
+    assert sheet[2] is sheet[2]
+    assert set(sheet._images) == {2}
+
+
+@pytest.mark.parametrize("index", [-1, 4])
+def test_missing_state(index):
+    sheet = TextureSheet.from_image(striped_texture(16, 4))
+
+    with pytest.raises(IndexError, match=f"Texture has no state {index}, it has 4 state"):
+        sheet[index]
+
+
+@pytest.mark.parametrize(
+    "texture, expected_mode",
+    [
+        (PIL.Image.new("RGBA", (4, 8)), "RGBA"),
+        (PIL.Image.new("LA", (4, 8)), "RGBA"),
+        (PIL.Image.new("RGB", (4, 8)), "RGB"),
+        (PIL.Image.new("P", (4, 8)), "RGB"),
+    ],
+)
+def test_mode(texture, expected_mode):
+    sheet = TextureSheet.from_image(texture)
+
+    assert sheet.mode == expected_mode
+    assert sheet[0].mode == expected_mode
+
+
+def test_paletted_with_transparency():
+    texture = PIL.Image.new("P", (4, 8))
+    texture.info["transparency"] = 0
+
+    assert TextureSheet.from_image(texture).mode == "RGBA"
+
+
+class Test_load_texture_sheet:
+    def test_shared(self, tmp_path: Path):
+        striped_texture(16, 4).save(tmp_path / "texture.png")
+
+        sheet = load_texture_sheet(tmp_path / "texture.png")
+        assert len(sheet) == 4
+        assert load_texture_sheet(tmp_path / "texture.png") is sheet
+        assert load_texture_sheet(tmp_path / "." / "texture.png") is sheet
+
+    def test_reloaded_when_changed(self, tmp_path: Path):
+        path = tmp_path / "texture.png"
+        striped_texture(16, 4).save(path)
+        sheet = load_texture_sheet(path)
+
+        striped_texture(16, 2).save(path)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert len(load_texture_sheet(path)) == 2
+        assert load_texture_sheet(path) is not sheet
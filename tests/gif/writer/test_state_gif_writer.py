@@ -0,0 +1,298 @@
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import PIL.Image
+import pytest
+from PIL import ImageSequence
+
+from mcanitexgen.gif import images2gif
+from mcanitexgen.gif import writer as writer_module
+from mcanitexgen.gif.writer import StateGifWriter, create_palette, write_gif
+
+
+@pytest.fixture
+def states():
+    return [
+        PIL.Image.new("RGBA", (16, 16), "red"),
+        PIL.Image.new("RGBA", (16, 16), "blue"),
+        PIL.Image.new("RGBA", (16, 16), (0, 255, 0, 0)),
+    ]
+
+
+def read_frames(path: Path):
+    frames = []
+    for f in ImageSequence.Iterator(PIL.Image.open(path)):
+        im = np.asarray(f.convert("RGBA")).copy()
+        im[im[..., 3] == 0] = 0  # The color of transparent pixels doesn't matter
+        frames.append((im, f.info["duration"]))
+    return frames
+
+
+def local_color_table_flags(gif: bytes):
+    """ Whether the image descriptor following each graphics control extension has a LCT """
+
+    flags = []
+    start = gif.find(b"\x21\xf9\x04")
+    while start != -1:
+        descriptor = gif[start + 8 : start + 18]
+        assert descriptor[0:1] == b","
+        flags.append(bool(descriptor[9] & 0x80))
+        start = gif.find(b"\x21\xf9\x04", start + 18)
+    return flags
+
+
+@pytest.mark.parametrize("global_palette", [False, True])
+def test_write_gif(states, global_palette, tmp_path: Path):
+    write_gif(
+        tmp_path / "test.gif",
+        states,
+        [(0, 0.5), (1, 0.1), (0, 0.2), (2, 1)],
+        global_palette=global_palette,
+    )
+
+    frames = read_frames(tmp_path / "test.gif")
+    assert [duration for _, duration in frames] == [500, 100, 200, 1000]
+    assert [tuple(im[0, 0]) for im, _ in frames] == [
+        (255, 0, 0, 255),
+        (0, 0, 255, 255),
+        (255, 0, 0, 255),
+        (0, 0, 0, 0),
+    ]
+
+
+def test_encode_each_state_once(states):
+    convert = images2gif.GifWriter.convertImagesToPIL
+    with patch.object(
+        images2gif.GifWriter, "convertImagesToPIL", autospec=True, side_effect=convert
+    ) as mock_convert:
+        writer = StateGifWriter(io.BytesIO(), states)
+        for i in range(100):
+            writer.write_frame(i % 2, 0.1)
+        writer.close()
+
+    assert mock_convert.call_count == 2
+    assert writer.frames == 100
+
+
+def test_repeated_frames_reuse_blocks(states):
+    sizes = []
+    for repetitions in [1, 2, 3]:
+        fp = io.BytesIO()
+        writer = StateGifWriter(fp, states)
+        for _ in range(repetitions):
+            writer.write_frame(0, 0.1)
+            writer.write_frame(1, 0.1)
+        writer.close()
+        sizes.append(len(fp.getvalue()))
+
+    # Every repetition adds exactly the same bytes, the headers are only written once
+    assert sizes[2] - sizes[1] == sizes[1] - sizes[0] < sizes[0]
+
+
+class Test_global_palette:
+    def test_no_local_color_tables(self, states):
+        fp = io.BytesIO()
+        writer = StateGifWriter(fp, states, global_palette=True)
+        for state in [0, 1, 2, 1]:
+            writer.write_frame(state, 0.1)
+        writer.close()
+
+        assert local_color_table_flags(fp.getvalue()) == [False] * 4
+
+    def test_local_color_tables_without_global_palette(self, states):
+        fp = io.BytesIO()
+        writer = StateGifWriter(fp, states)
+        for state in [0, 1, 2, 1]:
+            writer.write_frame(state, 0.1)
+        writer.close()
+
+        assert local_color_table_flags(fp.getvalue()) == [False, True, True, True]
+
+    def test_palette_computed_once(self, states):
+        with patch(
+            "mcanitexgen.gif.writer.create_palette", side_effect=create_palette
+        ) as mock_create_palette:
+            writer = StateGifWriter(io.BytesIO(), states, global_palette=True)
+            for i in range(10):
+                writer.write_frame(i % 3, 0.1)
+            writer.close()
+
+        mock_create_palette.assert_called_once_with(states, 0)
+
+    def test_fall_back_to_local_palettes(self, tmp_path: Path):
+        # 128 colors per state, 1024 colors together
+        states = [
+            PIL.Image.fromarray(
+                np.array(
+                    [[(s * 30, x // 2 * 30, y * 15) for x in range(16)] for y in range(16)],
+                    dtype=np.uint8,
+                )
+            )
+            for s in range(8)
+        ]
+        assert not writer_module.fits_one_palette(states)
+        assert writer_module.fits_one_palette(states[:1])
+
+        write_gif(
+            tmp_path / "test.gif", states, [(i, 0.1) for i in range(8)], global_palette=True
+        )
+
+        assert (
+            local_color_table_flags((tmp_path / "test.gif").read_bytes())
+            == [False] + [True] * 7
+        )
+        for (im, _), state in zip(read_frames(tmp_path / "test.gif"), states):
+            assert np.array_equal(im[..., :3], np.asarray(state))
+
+    def test_create_palette(self):
+        images = [
+            PIL.Image.new("RGB", (4, 4), "black"),
+            PIL.Image.new("RGB", (4, 4), "white"),
+        ]
+        palette = create_palette(images)
+
+        rgb = palette.getpalette()
+        colors = {tuple(rgb[i : i + 3]) for i in range(0, len(rgb), 3)}
+        assert colors == {(0, 0, 0), (255, 255, 255)}
+        for im in images:
+            mapped = im.quantize(palette=palette, dither=0)
+            assert 255 not in mapped.getdata()
+            assert mapped.convert("RGB").tobytes() == im.tobytes()
+
+
+class Test_streaming:
+    def test_frames_written_as_they_arrive(self, states):
+        fp = io.BytesIO()
+        sizes = []
+
+        def frames():
+            for i in range(5):
+                sizes.append(len(fp.getvalue()))
+                yield (i % 2, 0.1)
+
+        with StateGifWriter(fp, states) as writer:
+            writer.write_frames(frames())
+
+        assert sizes[0] == 0
+        assert sizes == sorted(sizes) and len(set(sizes)) == 5
+        assert fp.getvalue().endswith(b";")
+
+    def test_memory_bounded_by_states(self, states):
+        with StateGifWriter(io.BytesIO(), states, global_palette=True) as writer:
+            writer.write_frames((i % 3, 0.05) for i in range(10000))
+
+        assert writer.frames == 10000
+        assert len(writer._blocks) == 3
+
+    def test_no_frames(self, states):
+        with pytest.raises(ValueError, match="at least one frame"):
+            with StateGifWriter(io.BytesIO(), states):
+                pass
+
+    def test_not_closed_on_error(self, states):
+        fp = io.BytesIO()
+        with pytest.raises(KeyError):
+            with StateGifWriter(fp, states) as writer:
+                writer.write_frame(0, 0.1)
+                raise KeyError()
+
+        assert not fp.getvalue().endswith(b";")
+
+    def test_public_api(self):
+        import mcanitexgen.gif
+
+        assert mcanitexgen.gif.StateGifWriter is StateGifWriter
+        assert mcanitexgen.gif.write_gif is write_gif
+
+
+class Test_sub_rectangles:
+    @pytest.fixture
+    def states(self):
+        base = PIL.Image.new("RGBA", (16, 16), "red")
+        square = base.copy()
+        square.paste((0, 0, 255, 255), (4, 4, 6, 6))
+        hole = base.copy()
+        hole.paste((0, 0, 0, 0), (10, 2, 12, 3))
+        return [base, square, hole]
+
+    @pytest.mark.parametrize(
+        "sequence",
+        [
+            [0, 1, 0, 1],
+            [0, 2, 0, 1, 2, 1],
+            [2, 0, 1, 2],
+            [1],
+            [0, 1, 0, 1, 0],
+        ],
+    )
+    @pytest.mark.parametrize("loops", [0, 1])
+    def test_same_frames(self, states, sequence, loops, tmp_path: Path):
+        # Pillow < 9 decodes partial frames with a local color table wrongly, it applies
+        # their palette to the whole canvas. Hence only the global palette is compared.
+        frames = [(state, 0.1 * (i + 1)) for i, state in enumerate(sequence)]
+        options = {"global_palette": True, "loops": loops}
+        write_gif(tmp_path / "full.gif", states, frames, **options)
+        write_gif(tmp_path / "sub.gif", states, frames, sub_rectangles=True, **options)
+
+        full = read_frames(tmp_path / "full.gif")
+        sub = read_frames(tmp_path / "sub.gif")
+        assert len(full) == len(sub)
+        for (expected, expected_duration), (actual, duration) in zip(full, sub):
+            assert duration == expected_duration
+            assert np.array_equal(actual, expected)
+
+    def test_smaller(self, states, tmp_path: Path):
+        frames = [(i % 2, 0.1) for i in range(10)]
+        write_gif(tmp_path / "full.gif", states, frames, global_palette=True)
+        write_gif(
+            tmp_path / "sub.gif", states, frames, global_palette=True, sub_rectangles=True
+        )
+
+        assert (
+            Path(tmp_path, "sub.gif").stat().st_size
+            < Path(tmp_path, "full.gif").stat().st_size
+        )
+
+    def test_transitions_diffed_once(self, states):
+        with patch(
+            "mcanitexgen.gif.writer._bounding_box", side_effect=writer_module._bounding_box
+        ) as mock_bounding_box:
+            with StateGifWriter(io.BytesIO(), states, sub_rectangles=True) as writer:
+                writer.write_frames((i % 2, 0.1) for i in range(100))
+
+        assert mock_bounding_box.call_count == 2
+        assert writer.frames == 100
+
+    @pytest.mark.parametrize(
+        "before, after, expected",
+        [
+            (0, 1, (4, 4, 6, 6)),
+            (1, 0, (4, 4, 6, 6)),
+            (0, 0, (0, 0, 1, 1)),
+            (2, 0, (10, 2, 12, 3)),
+            (0, 2, None),
+        ],
+    )
+    def test_transition(self, states, before, after, expected):
+        writer = StateGifWriter(io.BytesIO(), states, sub_rectangles=True)
+        assert writer._transition(before, after) == expected
+
+
+@pytest.mark.parametrize("global_palette", [False, True])
+def test_sub_rectangles_quantise_each_state_once(global_palette):
+    states = [PIL.Image.new("RGBA", (16, 16), "red") for _ in range(3)]
+    for i, state in enumerate(states):
+        state.paste((0, 0, 255, 255), (i, i, i + 2, i + 2))
+
+    convert = images2gif.GifWriter.convertImagesToPIL
+    with patch.object(
+        images2gif.GifWriter, "convertImagesToPIL", autospec=True, side_effect=convert
+    ) as mock_convert:
+        with StateGifWriter(
+            io.BytesIO(), states, global_palette=global_palette, sub_rectangles=True
+        ) as writer:
+            writer.write_frames((i % 3, 0.1) for i in range(30))
+
+    assert mock_convert.call_count == 3